@@ -1,4 +1,5 @@
 from __future__ import annotations
+from functools import lru_cache
 from typing import Literal, Dict, Any
 
 from langgraph.graph import StateGraph, START, END
@@ -13,6 +14,8 @@ def _route_after_guardrails(state: CQIAState) -> Literal["analyze_node", "chat_n
         return "chat_node"
     return "end"
 
+# Compiled graph holds no run state (no checkpointer), so one instance serves every invoke
+@lru_cache(maxsize=1)
 def build_cqia_graph() -> Any:
     builder = StateGraph(CQIAState)
     builder.add_node("guardrails", guardrails)
@@ -22,10 +22,6 @@ from cqia.reporting.markdown import (
 )
 from cqia.reporting.exporters import export_dependency_graph, export_json_report
 
-from cqia.rag.chunking.ast_chunker import ASTFunctionChunker
-from cqia.rag.embeddings.vector_store import CodeEmbeddingManager
-from cqia.rag.retrieval.smart_retriever import FileAwareRetriever
-
 # Guardrails: route based on state.mode and inputs
 def guardrails(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
     mode = (state.get("mode") or "").lower()
@@ -40,7 +36,7 @@ def guardrails(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str
                 AIMessage(content="Provided path not found; cannot analyze.")
             ]
     elif mode == "chat":
-        if state.get("question"):
+        if state.get("question") or state.get("questions"):
             updates["next_action"] = "run_chat"
         else:
             updates["next_action"] = "end"
@@ -76,6 +72,8 @@ def analyze_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[s
 
     rules = load_rules(Path("presets/rules.yaml"))
     override_weights(rules.get("weights"))
+    cx = rules.get("complexity", {})
+    dup = rules.get("duplication", {})
 
     out_dir = Path("reports"); out_dir.mkdir(parents=True, exist_ok=True)
     out_path = write_basic_report(files, out_dir)
@@ -87,9 +85,10 @@ def analyze_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[s
         exclude,
         rules=rules,
         max_bytes=max_bytes,
-        warn_at=rules.get("complexity", {}).get("warn_at", 10),
-        dup_k=rules.get("duplication", {}).get("k_shingle", 7),
-        dup_threshold=rules.get("duplication", {}).get("similarity_threshold", 0.90),
+        warn_at=cx.get("warn_at", 10),
+        dup_k=dup.get("k_shingle", 7),
+        dup_threshold=dup.get("similarity_threshold", 0.90),
+        include_raw=True,
     )
     append_top_issues(out_path, results.get("findings_scored", []))
     append_per_category_summary(out_path, results.get("findings_scored", []))
@@ -120,31 +119,87 @@ def analyze_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[s
     }
 
 # Chat node: retrieve and answer deterministically (no model call here)
-def chat_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
-    question = state.get("question") or ""
-    k = int(state.get("k") or 5)
-    boost = float(state.get("name_match_boost") or 0.3)
+_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+_PERSIST_DIR = ".cqia_vectordb"
+
+def _index_version(persist_dir: str) -> str:
+    # Re-indexing touches the Chroma sqlite file, which invalidates cached retrievals
+    try:
+        return str((Path(persist_dir) / "chroma.sqlite3").stat().st_mtime_ns)
+    except OSError:
+        return ""
+
+def _doc_dicts(docs) -> List[Dict[str, Any]]:
+    return [
+        {"file_path": (d.metadata or {}).get("file_path",""),
+         "name": (d.metadata or {}).get("name",""),
+         "chunk_type": (d.metadata or {}).get("chunk_type",""),
+         "start_line": int((d.metadata or {}).get("start_line",1)),
+         "end_line": int((d.metadata or {}).get("end_line",1))}
+        for d in docs
+    ]
 
-    manager = CodeEmbeddingManager()
-    retriever = FileAwareRetriever(vector_store=manager.vector_store, k=k, name_match_boost=boost)
-    docs = retriever.get_relevant_documents(question)
+def _retriever(k: int, boost: float):
+    # RAG stack is heavy (chroma, sentence-transformers); only pay for it on a cache miss
+    from cqia.rag.embeddings.vector_store import CodeEmbeddingManager
+    from cqia.rag.retrieval.smart_retriever import FileAwareRetriever
 
+    manager = CodeEmbeddingManager(persist_directory=_PERSIST_DIR, embedding_model=_EMBEDDING_MODEL)
+    return FileAwareRetriever(vector_store=manager.vector_store, k=k, name_match_boost=boost)
+
+def _retrieve(question: str, k: int, boost: float) -> List[Dict[str, Any]]:
+    return _doc_dicts(_retriever(k, boost).get_relevant_documents(question))
+
+def _retrieve_batch(questions: List[str], k: int, boost: float) -> List[List[Dict[str, Any]]]:
+    # One embedding pass and one Chroma query for every question that missed the cache
+    batched = _retriever(k, boost).batch_get_relevant_documents(questions)
+    return [_doc_dicts(docs) for docs in batched]
+
+def _bullets(retrieval_docs: List[Dict[str, Any]]) -> str:
     # Deterministic, template-based answer (LLM hook can be added later)
     bullets: List[str] = []
-    for d in docs:
-        md = d.metadata or {}
-        bullets.append(f"- {md.get('file_path','')} :: {md.get('name','')} [{md.get('chunk_type','')}] {md.get('start_line',1)}-{md.get('end_line',1)}")
-    stitched = "Top matches:\n" + "\n".join(bullets) if bullets else "No matches."
+    for md in retrieval_docs:
+        bullets.append(
+            f"- {md['file_path']} :: {md['name']} [{md['chunk_type']}] "
+            f"{md['start_line']}-{md['end_line']}"
+        )
+    return "Top matches:\n" + "\n".join(bullets) if bullets else "No matches."
+
+def chat_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
+    from cqia.rag.query_cache import QueryCache
+
+    k = int(state.get("k") or 5)
+    boost = float(state.get("name_match_boost") or 0.3)
+    cache = QueryCache()
+    version = _index_version(_PERSIST_DIR)
+
+    questions = [q for q in (state.get("questions") or []) if q]
+    if not questions:
+        question = state.get("question") or ""
+        key = QueryCache.make_key(question, _EMBEDDING_MODEL, k, boost, version)
+        retrieval_docs = cache.get_or_compute(key, lambda: _retrieve(question, k, boost))
+        stitched = _bullets(retrieval_docs)
+        return {
+            "retrieval_docs": retrieval_docs,
+            "answer": stitched,
+            "messages": (state.get("messages") or []) + [AIMessage(content=stitched)],
+            "next_action": "end",
+            "steps": (state.get("steps") or []) + ["chat"],
+        }
+
+    keys = [QueryCache.make_key(q, _EMBEDDING_MODEL, k, boost, version) for q in questions]
+    per_question = [cache.get(key) for key in keys]
+    missing = [i for i, hit in enumerate(per_question) if hit is None]
+    if missing:
+        fetched = _retrieve_batch([questions[i] for i in missing], k, boost)
+        for i, docs in zip(missing, fetched):
+            cache.set(keys[i], docs)
+            per_question[i] = docs
 
+    stitched = "\n\n".join(f"Q: {q}\n{_bullets(docs)}" for q, docs in zip(questions, per_question))
     return {
-        "retrieval_docs": [
-            {"file_path": (d.metadata or {}).get("file_path",""),
-             "name": (d.metadata or {}).get("name",""),
-             "chunk_type": (d.metadata or {}).get("chunk_type",""),
-             "start_line": int((d.metadata or {}).get("start_line",1)),
-             "end_line": int((d.metadata or {}).get("end_line",1))}
-            for d in docs
-        ],
+        "retrieval_docs": [md for docs in per_question for md in docs],
+        "retrieval_docs_by_question": per_question,
         "answer": stitched,
         "messages": (state.get("messages") or []) + [AIMessage(content=stitched)],
         "next_action": "end",
@@ -11,6 +11,7 @@ class CQIAState(TypedDict, total=False):
     exclude: Optional[List[str]]
     max_bytes: Optional[int]
     question: Optional[str]
+    questions: Optional[List[str]]
     k: Optional[int]
     name_match_boost: Optional[float]
 
@@ -21,6 +22,7 @@ class CQIAState(TypedDict, total=False):
     analysis_report_path: Optional[str]
     analysis_json_path: Optional[str]
     retrieval_docs: Optional[List[Dict[str, Any]]]
+    retrieval_docs_by_question: Optional[List[List[Dict[str, Any]]]]
     answer: Optional[str]
 
     # Control / guardrails
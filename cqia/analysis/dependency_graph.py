@@ -1,8 +1,23 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from itertools import islice
 from typing import Dict, Iterable, Tuple, List
 import json
 import networkx as nx
+import numpy as np
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    _HAS_SCIPY = True
+except Exception:
+    _HAS_SCIPY = False
 
 def _id(x) -> str:
     return str(x)
@@ -12,7 +27,7 @@ class DepEdge:
     src: str
     dst: str
 
-@dataclass
+@dataclass(slots=True)
 class DepMetrics:
     fan_in: Dict[str, int]
     fan_out: Dict[str, int]
@@ -20,6 +35,57 @@ class DepMetrics:
     top_fan_in: List[Tuple[str, int]]
     top_fan_out: List[Tuple[str, int]]
 
+def _nontrivial_sccs(G: nx.DiGraph, src: np.ndarray, dst: np.ndarray) -> List[List[int]]:
+    """Strongly connected components with 2+ nodes, as node indices, ordered by first node."""
+    n = G.number_of_nodes()
+    if _HAS_SCIPY:
+        # CSR adjacency + C-level Tarjan instead of walking networkx's dict-of-dicts
+        adj = csr_matrix((np.ones(src.size, dtype=np.int8), (src, dst)), shape=(n, n))
+        _, labels = connected_components(adj, directed=True, connection="strong")
+        sizes = np.bincount(labels)
+        members = np.flatnonzero(sizes[labels] > 1)
+        groups: Dict[int, List[int]] = {}
+        for i in members.tolist():
+            groups.setdefault(int(labels[i]), []).append(i)
+        comps = list(groups.values())
+    else:
+        index = {node: i for i, node in enumerate(G.nodes)}
+        comps = [
+            sorted(index[v] for v in scc)
+            for scc in nx.strongly_connected_components(G)
+            if len(scc) > 1
+        ]
+    comps.sort(key=lambda c: c[0])
+    return comps
+
+def _find_cycles(
+    G: nx.DiGraph, src: np.ndarray, dst: np.ndarray, limit: int = 10, length_bound: int = 8
+) -> List[List[str]]:
+    # Cycles only live inside non-trivial SCCs; enumerate there and stop at the limit.
+    # Subgraphs are built in node order so the result doesn't depend on set iteration.
+    nodes = list(G.nodes)
+    cycles: List[List[str]] = []
+    for comp in _nontrivial_sccs(G, src, dst):
+        names = [nodes[i] for i in comp]
+        keep = set(names)
+        H = nx.DiGraph()
+        H.add_nodes_from(names)
+        H.add_edges_from((u, v) for u in names for v in G.successors(u) if v in keep)
+        cycles.extend(islice(nx.simple_cycles(H, length_bound=length_bound), limit - len(cycles)))
+        if len(cycles) >= limit:
+            break
+    return cycles
+
+def _top_k(nodes: List[str], counts: np.ndarray, k: int = 10) -> List[Tuple[str, int]]:
+    # Partition to the k-th largest, then stable-sort only the survivors (ties keep node order)
+    if counts.size > k:
+        kth = np.partition(counts, counts.size - k)[counts.size - k]
+        idx = np.flatnonzero(counts >= kth)
+    else:
+        idx = np.arange(counts.size)
+    idx = idx[np.argsort(-counts[idx], kind="stable")][:k]
+    return [(nodes[i], int(counts[i])) for i in idx]
+
 def build_dep_graph(edges: Iterable[DepEdge]) -> tuple[nx.DiGraph, DepMetrics]:
     G = nx.DiGraph()
     for e in edges:
@@ -28,14 +94,21 @@ def build_dep_graph(edges: Iterable[DepEdge]) -> tuple[nx.DiGraph, DepMetrics]:
         if not src or not dst or src == dst:
             continue
         G.add_edge(src, dst)
-    fan_in = { _id(n): int(G.in_degree(n)) for n in G.nodes }
-    fan_out = { _id(n): int(G.out_degree(n)) for n in G.nodes }
+    nodes = [_id(n) for n in G.nodes]
+    index = {n: i for i, n in enumerate(G.nodes)}
+    n_edges = G.number_of_edges()
+    src = np.fromiter((index[u] for u, _ in G.edges), dtype=np.int64, count=n_edges)
+    dst = np.fromiter((index[v] for _, v in G.edges), dtype=np.int64, count=n_edges)
+    fan_in_arr = np.bincount(dst, minlength=len(nodes))
+    fan_out_arr = np.bincount(src, minlength=len(nodes))
+    fan_in = dict(zip(nodes, fan_in_arr.tolist()))
+    fan_out = dict(zip(nodes, fan_out_arr.tolist()))
     try:
-        raw_cycles = list(nx.simple_cycles(G))
+        raw_cycles = _find_cycles(G, src, dst)
     except Exception:
         raw_cycles = []
-    top_fi = sorted(fan_in.items(), key=lambda x: x[1], reverse=True)[:10]
-    top_fo = sorted(fan_out.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_fi = _top_k(nodes, fan_in_arr)
+    top_fo = _top_k(nodes, fan_out_arr)
     metrics = DepMetrics(
         fan_in=fan_in,
         fan_out=fan_out,
@@ -46,10 +119,15 @@ def build_dep_graph(edges: Iterable[DepEdge]) -> tuple[nx.DiGraph, DepMetrics]:
     return G, metrics
 
 def write_dep_json(G: nx.DiGraph, path):
+    # Compact output written straight to the file; no intermediate indented string
     data = {
         "nodes": [{"id": _id(n)} for n in G.nodes],
         "edges": [{"source": _id(u), "target": _id(v)} for u, v in G.edges],
     }
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    if _HAS_ORJSON:
+        path.write_bytes(orjson.dumps(data))
+    else:
+        # One-shot dumps (C encoder) and a single write, rather than json.dump's chunked writes
+        path.write_bytes(json.dumps(data, separators=(",", ":")).encode("utf-8"))
     return path
@@ -1,9 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Iterator
 from cqia.parsing.ir import FunctionIR
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ComplexityFinding:
     id: str
     category: str
@@ -14,13 +14,16 @@ class ComplexityFinding:
     value: float
     threshold: float
 
-def detect_complexity(functions: Iterable[FunctionIR], warn_at: int = 10) -> list[ComplexityFinding]:
-    findings: list[ComplexityFinding] = []
+def iter_complexity(
+    functions: Iterable[FunctionIR], warn_at: int = 10
+) -> Iterator[ComplexityFinding]:
+    threshold = float(warn_at)
     for fn in functions:
-        decisions = int(fn.metrics.get("complexity_branch_count", 0))
-        complexity = 1 + decisions  # decision-points + 1
+        decisions = fn.metrics.get("complexity_branch_count")
+        # decision-points + 1
+        complexity = 1 + (decisions if type(decisions) is int else int(decisions or 0))
         if complexity >= warn_at:
-            findings.append(ComplexityFinding(
+            yield ComplexityFinding(
                 id=f"{fn.id}#complexity",
                 category="complexity",
                 message=f"High cyclomatic complexity: {complexity} (≥ {warn_at})",
@@ -28,6 +31,10 @@ def detect_complexity(functions: Iterable[FunctionIR], warn_at: int = 10) -> lis
                 start_line=fn.span.start_line,
                 end_line=fn.span.end_line,
                 value=complexity,
-                threshold=float(warn_at),
-            ))
-    return findings
+                threshold=threshold,
+            )
+
+def detect_complexity(
+    functions: Iterable[FunctionIR], warn_at: int = 10
+) -> list[ComplexityFinding]:
+    return list(iter_complexity(functions, warn_at=warn_at))
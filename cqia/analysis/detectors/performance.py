@@ -1,9 +1,13 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 import ast
+import os
 from cqia.parsing.ir import FunctionIR
+from cqia.analysis.parse_cache import get_tree, walk_preorder
 
 IO_FUNCS = {
     ("", "open"),
@@ -16,7 +20,7 @@ REQUESTS_FUNCS = {
     ("requests", "delete"), ("requests", "head"), ("requests", "patch"),
 }
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PerfFinding:
     id: str
     category: str
@@ -27,98 +31,118 @@ class PerfFinding:
     hint: str
     kind: str
 
-class _PerfVisitor(ast.NodeVisitor):
-    def __init__(self, src_path: Path, text: str):
-        self.src_path = src_path
-        self.text = text
-        self.findings: list[PerfFinding] = []
-        self._loop_depth = 0
+def _call_target(node: ast.Call) -> tuple[str, str] | None:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return ("", func.id)
+    if isinstance(func, ast.Attribute):
+        parts = []
+        cur = func
+        while isinstance(cur, ast.Attribute):
+            parts.append(cur.attr)
+            cur = cur.value
+        if isinstance(cur, ast.Name):
+            parts.append(cur.id)
+        parts.reverse()
+        if not parts:
+            return None
+        qual = ".".join(parts[:-1])
+        name = parts[-1]
+        return (qual, name)
+    return None
 
-    def _call_target(self, node: ast.Call) -> tuple[str, str] | None:
-        func = node.func
-        if isinstance(func, ast.Name):
-            return ("", func.id)
-        if isinstance(func, ast.Attribute):
-            parts = []
-            cur = func
-            while isinstance(cur, ast.Attribute):
-                parts.append(cur.attr)
-                cur = cur.value
-            if isinstance(cur, ast.Name):
-                parts.append(cur.id)
-            parts.reverse()
-            if not parts:
-                return None
-            qual = ".".join(parts[:-1]) if len(parts) > 1 else parts
-            name = parts[-1]
-            return (qual, name)
-        return None
+def _finding(src_path: Path, kind: str, node: ast.AST, msg: str, hint: str) -> PerfFinding:
+    return PerfFinding(
+        id=f"{src_path.as_posix()}::{kind}:{getattr(node, 'lineno', 1)}",
+        category="performance",
+        message=msg,
+        file=src_path.as_posix(),
+        start_line=int(getattr(node, "lineno", 1)),
+        end_line=int(getattr(node, "end_lineno", getattr(node, "lineno", 1))),
+        hint=hint,
+        kind=kind
+    )
 
-    def _mark(self, kind: str, node: ast.AST, msg: str, hint: str):
-        self.findings.append(PerfFinding(
-            id=f"{self.src_path.as_posix()}::{kind}:{getattr(node, 'lineno', 1)}",
-            category="performance",
-            message=msg,
-            file=self.src_path.as_posix(),
-            start_line=int(getattr(node, "lineno", 1)),
-            end_line=int(getattr(node, "end_lineno", getattr(node, "lineno", 1))),
-            hint=hint,
-            kind=kind
-        ))
+_LOOPS = (ast.For, ast.While)
 
-    def visit_For(self, node: ast.For):
-        self._loop_depth += 1
-        self.generic_visit(node)
-        self._loop_depth -= 1
-
-    def visit_While(self, node: ast.While):
-        self._loop_depth += 1
-        self.generic_visit(node)
-        self._loop_depth -= 1
+def _scan_tree(src_path: Path, tree: ast.AST) -> list[PerfFinding]:
+    findings: list[PerfFinding] = []
+    for node, depth in walk_preorder(tree, _LOOPS):
+        t = type(node)
+        if depth:
+            if t is ast.Call:
+                tgt = _call_target(node)
+                if tgt:
+                    qual, name = tgt
+                    if (qual, name) in REQUESTS_FUNCS:
+                        findings.append(_finding(
+                            src_path, "requests_in_loop", node,
+                            "HTTP request inside loop; consider batching or concurrency",
+                            "Use requests.Session for pooling or asyncio/httpx to parallelize."))
+                    elif (qual, name) in IO_FUNCS or (
+                        name in {"read_text", "write_text"} and "Path" in qual
+                    ):
+                        findings.append(_finding(src_path, "io_in_loop", node,
+                                   "File I/O inside loop; hoist reads/writes or buffer",
+                                   "Read outside the loop or batch writes; flush once."))
+            elif t is ast.AugAssign:
+                if isinstance(node.op, ast.Add):
+                    findings.append(_finding(src_path, "string_concat_in_loop", node,
+                               "String concatenation in loop; use list append + ''.join(...)",
+                               "Append to a list inside loop, then s=''.join(parts) once."))
+            elif t is ast.Assign:
+                if isinstance(node.value, ast.BinOp) and isinstance(node.value.op, ast.Add):
+                    target = node.targets[0] if len(node.targets) == 1 else None
+                    if isinstance(target, ast.Name) and isinstance(node.value.left, ast.Name):
+                        if target.id == node.value.left.id:
+                            findings.append(_finding(
+                                src_path, "string_concat_in_loop", node,
+                                "String concatenation in loop; use list append + ''.join(...)",
+                                "Append to a list inside loop, then s=''.join(parts) once."))
+    return findings
 
-    def visit_Call(self, node: ast.Call):
-        if self._loop_depth > 0:
-            tgt = self._call_target(node)
-            if tgt:
-                qual, name = tgt
-                if (qual, name) in REQUESTS_FUNCS:
-                    self._mark("requests_in_loop", node,
-                               "HTTP request inside loop; consider batching or concurrency",
-                               "Use requests.Session for pooling or asyncio/httpx to parallelize.")
-                elif (qual, name) in IO_FUNCS or (name in {"read_text", "write_text"} and "Path" in qual):
-                    self._mark("io_in_loop", node,
-                               "File I/O inside loop; hoist reads/writes or buffer",
-                               "Read outside the loop or batch writes; flush once.")
-        self.generic_visit(node)
+# Below this many files the process-pool startup costs more than it saves
+_PARALLEL_MIN_FILES = 32
 
-    def visit_AugAssign(self, node: ast.AugAssign):
-        if self._loop_depth > 0 and isinstance(node.op, ast.Add):
-            self._mark("string_concat_in_loop", node,
-                       "String concatenation in loop; use list append + ''.join(...)",
-                       "Append to a list inside loop, then s=''.join(parts) once.")
-        self.generic_visit(node)
+def _scan_one_file(item: tuple[Path, Path, list[tuple[int, int]], str | None]) -> list[PerfFinding]:
+    root, rel, spans, text = item
+    try:
+        if text is None:
+            text = (root / rel).read_text(encoding="utf-8", errors="ignore")
+        tree = get_tree(rel, text)
+        findings = _scan_tree(rel, tree)
+    except Exception:
+        # One unreadable or odd file costs only its own findings, not the whole batch's
+        return []
+    # Index findings by line so each span is a bisect range instead of a full scan
+    order = sorted(range(len(findings)), key=lambda i: findings[i].start_line)
+    lines = [findings[i].start_line for i in order]
+    out: list[PerfFinding] = []
+    for start, end in spans:
+        lo = bisect_left(lines, start)
+        hi = bisect_right(lines, end)
+        out.extend(findings[i] for i in sorted(order[lo:hi]))
+    return out
 
-    def visit_Assign(self, node: ast.Assign):
-        if self._loop_depth > 0 and isinstance(node.value, ast.BinOp) and isinstance(node.value.op, ast.Add):
-            if node.targets and isinstance(node.targets, ast.Name) and isinstance(node.value.left, ast.Name):
-                if node.targets.id == node.value.left.id:
-                    self._mark("string_concat_in_loop", node,
-                               "String concatenation in loop; use list append + ''.join(...)",
-                               "Append to a list inside loop, then s=''.join(parts) once.")
-        self.generic_visit(node)
+def detect_performance(
+    functions: Iterable[FunctionIR],
+    root: Path,
+    parallel: bool = True,
+    texts: dict[Path, str] | None = None,
+) -> list[PerfFinding]:
+    # Parse each file once and attribute findings to every function span it contains
+    by_file: dict[Path, list[tuple[int, int]]] = {}
+    for fn in functions:
+        by_file.setdefault(fn.span.path, []).append((fn.span.start_line, fn.span.end_line))
+    texts = texts or {}
+    items = [(root, rel, spans, texts.get(rel)) for rel, spans in by_file.items()]
 
-def detect_performance(functions: Iterable[FunctionIR], root: Path) -> list[PerfFinding]:
     out: list[PerfFinding] = []
-    for fn in functions:
-        fpath = root / fn.span.path
-        try:
-            text = fpath.read_text(encoding="utf-8", errors="ignore")
-            tree = ast.parse(text)
-        except Exception:
-            continue
-        v = _PerfVisitor(fn.span.path, text)
-        v.visit(tree)
-        for f in v.findings:
-            if fn.span.start_line <= f.start_line <= fn.span.end_line:
-                out.append(f)
+    if parallel and len(items) > _PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for found in ex.map(_scan_one_file, items, chunksize=10):
+                out.extend(found)
+    else:
+        for item in items:
+            out.extend(_scan_one_file(item))
     return out
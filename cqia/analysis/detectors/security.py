@@ -4,8 +4,9 @@ import ast
 from pathlib import Path
 from typing import Iterable
 from cqia.parsing.ir import ModuleIR
+from cqia.analysis.parse_cache import get_tree, walk_preorder
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SecFinding:
     id: str
     category: str
@@ -15,101 +16,114 @@ class SecFinding:
     end_line: int
     hint: str
 
+# Loaders that only construct plain Python types
+_SAFE_YAML_LOADERS = frozenset({"SafeLoader", "CSafeLoader", "BaseLoader", "CBaseLoader"})
+
+def _has_safe_loader(node: ast.Call) -> bool:
+    """yaml.load(..., Loader=<safe loader>) or a safe loader as the second positional argument."""
+    loader = next((kw.value for kw in node.keywords if kw.arg == "Loader"), None)
+    if loader is None and len(node.args) > 1:
+        loader = node.args[1]
+    if isinstance(loader, ast.Attribute):
+        return loader.attr in _SAFE_YAML_LOADERS
+    return isinstance(loader, ast.Name) and loader.id in _SAFE_YAML_LOADERS
+
 # Python security scanning via AST
-class _PySec(ast.NodeVisitor):
-    def __init__(self, path: Path):
-        self.path = path
-        self.findings: list[SecFinding] = []
+def _check_call(path: Path, node: ast.Call, findings: list[SecFinding]) -> None:
+    # eval/exec
+    if isinstance(node.func, ast.Name) and node.func.id in {"eval", "exec"}:
+        findings.append(SecFinding(
+            id=f"{path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
+            category="security",
+            message=f"Use of {node.func.id} is dangerous",
+            file=path.as_posix(),
+            start_line=getattr(node, "lineno", 1),
+            end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
+            hint="Avoid eval/exec; parse inputs or use safe alternatives.",
+        ))
+    # subprocess(..., shell=True)
+    try:
+        if isinstance(node.func, ast.Attribute) and node.func.attr in {"Popen", "call", "run"}:
+            if isinstance(node.func.value, ast.Name) and node.func.value.id == "subprocess":
+                for kw in node.keywords:
+                    if (
+                        kw.arg == "shell"
+                        and isinstance(kw.value, ast.Constant)
+                        and kw.value.value is True
+                    ):
+                        findings.append(SecFinding(
+                            id=f"{path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
+                            category="security",
+                            message="subprocess with shell=True can lead to command injection",
+                            file=path.as_posix(),
+                            start_line=getattr(node, "lineno", 1),
+                            end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
+                            hint="Pass shell=False and provide args list; sanitize inputs.",
+                        ))
+                        break
+    except Exception:
+        pass
+    # yaml.load without SafeLoader
+    try:
+        if isinstance(node.func, ast.Attribute) and node.func.attr == "load":
+            if (
+                isinstance(node.func.value, ast.Name)
+                and node.func.value.id == "yaml"
+                and not _has_safe_loader(node)
+            ):
+                findings.append(SecFinding(
+                    id=f"{path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
+                    category="security",
+                    message="yaml.load without SafeLoader is unsafe",
+                    file=path.as_posix(),
+                    start_line=getattr(node, "lineno", 1),
+                    end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
+                    hint="Use yaml.safe_load or specify SafeLoader.",
+                ))
+    except Exception:
+        pass
 
-    def visit_Call(self, node: ast.Call):
-        # eval/exec
-        if isinstance(node.func, ast.Name) and node.func.id in {"eval", "exec"}:
-            self.findings.append(SecFinding(
-                id=f"{self.path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
-                category="security",
-                message=f"Use of {node.func.id} is dangerous",
-                file=self.path.as_posix(),
-                start_line=getattr(node, "lineno", 1),
-                end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
-                hint="Avoid eval/exec; parse inputs or use safe alternatives.",
-            ))
-        # subprocess(..., shell=True)
-        try:
-            if isinstance(node.func, ast.Attribute) and node.func.attr in {"Popen", "call", "run"}:
-                if isinstance(node.func.value, ast.Name) and node.func.value.id == "subprocess":
-                    for kw in node.keywords:
-                        if kw.arg == "shell" and isinstance(kw.value, ast.Constant) and kw.value.value is True:
-                            self.findings.append(SecFinding(
-                                id=f"{self.path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
-                                category="security",
-                                message="subprocess with shell=True can lead to command injection",
-                                file=self.path.as_posix(),
-                                start_line=getattr(node, "lineno", 1),
-                                end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
-                                hint="Pass shell=False and provide args list; sanitize inputs.",
-                            ))
-                            break
-        except Exception:
-            pass
-        # yaml.load without SafeLoader
-        try:
-            if isinstance(node.func, ast.Attribute) and node.func.attr == "load":
-                if isinstance(node.func.value, ast.Name) and node.func.value.id == "yaml":
-                    self.findings.append(SecFinding(
-                        id=f"{self.path.as_posix()}::{getattr(node, 'lineno', 1)}#pysec",
-                        category="security",
-                        message="yaml.load without SafeLoader is unsafe",
-                        file=self.path.as_posix(),
-                        start_line=getattr(node, "lineno", 1),
-                        end_line=getattr(node, "end_lineno", getattr(node, "lineno", 1)),
-                        hint="Use yaml.safe_load or specify SafeLoader.",
-                    ))
-        except Exception:
-            pass
-        self.generic_visit(node)
+_HANDLERS = {ast.Call: _check_call}
 
 def scan_python_security(mod: ModuleIR, text: str) -> list[SecFinding]:
     try:
-        tree = ast.parse(text)
+        tree = get_tree(mod.path, text)
     except Exception:
         return []
-    v = _PySec(mod.path)
-    v.visit(tree)
-    return v.findings
+    findings: list[SecFinding] = []
+    for node, _ in walk_preorder(tree):
+        handler = _HANDLERS.get(type(node))
+        if handler is not None:
+            handler(mod.path, node, findings)
+    return findings
+
+# JS/TS minimal heuristic via text search (Tree-sitter patterns can replace later).
+# str.find on the lowered text beat both a regex alternation and pyahocorasick for this
+# handful of needles; the first hit's offset gives the reported line.
+_JS_RULES = (
+    # (id suffix, needle, required co-occurring needle, message, hint)
+    ("eval", "eval(", None, "Use of eval detected", "Avoid eval; use JSON.parse or safer parsing."),
+    ("newfunc", "new function(", None, "Use of new Function detected",
+     "Avoid dynamic code execution."),
+    ("exec", ".exec(", "child_process", "child_process.exec detected; risk of command injection",
+     "Prefer execFile/spawn with args; sanitize inputs."),
+)
 
-# JS/TS minimal heuristic via text search (Tree-sitter patterns can replace later)
 def scan_js_security(mod: ModuleIR, text: str) -> list[SecFinding]:
     findings: list[SecFinding] = []
     lowered = text.lower()
-    # eval/new Function
-    if "eval(" in lowered:
-        findings.append(SecFinding(
-            id=f"{mod.path.as_posix()}::eval#jssec",
-            category="security",
-            message="Use of eval detected",
-            file=mod.path.as_posix(),
-            start_line=1,
-            end_line=1,
-            hint="Avoid eval; use JSON.parse or safer parsing.",
-        ))
-    if "new Function(" .lower() in lowered:
-        findings.append(SecFinding(
-            id=f"{mod.path.as_posix()}::newfunc#jssec",
-            category="security",
-            message="Use of new Function detected",
-            file=mod.path.as_posix(),
-            start_line=1,
-            end_line=1,
-            hint="Avoid dynamic code execution.",
-        ))
-    if "child_process" in lowered and ".exec(" in lowered:
+    for suffix, needle, requires, message, hint in _JS_RULES:
+        idx = lowered.find(needle)
+        if idx < 0 or (requires is not None and requires not in lowered):
+            continue
+        line = text.count("\n", 0, idx) + 1
         findings.append(SecFinding(
-            id=f"{mod.path.as_posix()}::exec#jssec",
+            id=f"{mod.path.as_posix()}::{suffix}#jssec",
             category="security",
-            message="child_process.exec detected; risk of command injection",
+            message=message,
             file=mod.path.as_posix(),
-            start_line=1,
-            end_line=1,
-            hint="Prefer execFile/spawn with args; sanitize inputs.",
+            start_line=line,
+            end_line=line,
+            hint=hint,
         ))
     return findings
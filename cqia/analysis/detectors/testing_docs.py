@@ -6,9 +6,10 @@ import ast
 import re
 
 from cqia.parsing.ir import ModuleIR
+from cqia.analysis.parse_cache import get_tree
 
 # ---- Docstring detector (PEP 257) ----
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DocFinding:
     id: str
     category: Literal["documentation"]
@@ -21,7 +22,7 @@ class DocFinding:
 def detect_missing_docstrings(mod_path: Path, text: str) -> list[DocFinding]:
     out: list[DocFinding] = []
     try:
-        tree = ast.parse(text or "")
+        tree = get_tree(mod_path, text or "")
     except Exception:
         return out
 
@@ -65,7 +66,7 @@ def detect_missing_docstrings(mod_path: Path, text: str) -> list[DocFinding]:
     return out
 
 # ---- Testing gaps (pytest conventions) ----
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TestGapFinding:
     id: str
     category: Literal["testing"]
@@ -130,16 +131,24 @@ def detect_test_gaps(repo_root: Path, src_files: list[Path]) -> list[TestGapFind
     return out
 
 # ---- Orchestrator used by runner ----
-def run_testing_and_docs(root: Path, modules: Iterable[ModuleIR]) -> tuple[list[DocFinding], list[TestGapFinding]]:
+def collect_docstring_findings(root: Path, modules: Iterable[ModuleIR]) -> list[DocFinding]:
     docs: list[DocFinding] = []
     for mod in modules:
-        fpath = root / mod.path
-        try:
-            text = fpath.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            text = ""
+        text = mod.text
+        if text is None:
+            try:
+                text = (root / mod.path).read_text(encoding="utf-8", errors="ignore")
+            except Exception:
+                text = ""
         if mod.lang == "python":
             docs.extend(detect_missing_docstrings(mod.path, text))
+    return docs
+
+def run_testing_and_docs(
+    root: Path, modules: Iterable[ModuleIR]
+) -> tuple[list[DocFinding], list[TestGapFinding]]:
+    modules = list(modules)
+    docs = collect_docstring_findings(root, modules)
 
     # Build src file list (relative paths)
     src_files = [m.path for m in modules if m.lang == "python"]
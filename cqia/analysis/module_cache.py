@@ -0,0 +1,128 @@
+"""
+Persistent cache of parsed ModuleIR keyed on file path and content, so unchanged files skip parsing.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+import hashlib
+import hmac
+import os
+import pickle
+import sys
+
+try:
+    from blake3 import blake3 as _hasher
+except Exception:
+    _hasher = hashlib.blake2b
+
+from cqia.parsing import ir, python_parser, ts_parser
+from cqia.parsing.ir import ModuleIR
+
+# Bump when the entry format changes; parser changes are covered by _PARSER_STAMP
+_CACHE_VERSION = "3"
+
+def _parser_stamp() -> str:
+    """Digest of the parser modules' source; entries from any other parser version never match."""
+    h = hashlib.blake2b(digest_size=8)
+    for mod in (ir, python_parser, ts_parser):
+        try:
+            h.update(Path(mod.__file__).read_bytes())
+        except Exception:
+            h.update(mod.__name__.encode("utf-8"))
+    return h.hexdigest()
+
+_PARSER_STAMP = _parser_stamp()
+
+def user_cache_root() -> Path:
+    """Per-user cqia cache directory (XDG_CACHE_HOME, LOCALAPPDATA on Windows, else ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    return Path(base or Path.home() / ".cache") / "cqia"
+
+def default_cache_dir(root: Path) -> Path:
+    """Module cache for one analyzed root, kept in the user cache and never under root itself."""
+    digest = hashlib.blake2b(str(Path(root).resolve()).encode("utf-8"), digest_size=8).hexdigest()
+    return user_cache_root() / "modules" / digest
+
+_MAC_SIZE = 32
+_SECRET: bytes | None = None
+
+def _secret() -> bytes:
+    """Per-user signing key, created once with owner-only permissions next to the caches."""
+    global _SECRET
+    if _SECRET is None:
+        path = user_cache_root() / "module_cache.key"
+        try:
+            _SECRET = path.read_bytes()
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            key = os.urandom(32)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(key)
+                _SECRET = key
+            except FileExistsError:
+                # Another process created it first
+                _SECRET = path.read_bytes()
+        if len(_SECRET) < 16:
+            raise ValueError(f"module cache key too short: {path}")
+    return _SECRET
+
+def _mac(key: str, payload: bytes) -> bytes:
+    return hmac.new(_secret(), key.encode("utf-8") + b"\0" + payload, hashlib.sha256).digest()
+
+class ModuleCache:
+    """
+    Entries are pickles signed with a per-user key; anything unsigned or signed for another key
+    is ignored, so a planted cache directory can't make get() unpickle attacker data.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _secret()
+
+    @staticmethod
+    def make_key(rel: Path, lang: str, text: str) -> str:
+        # Path is part of the key because ModuleIR ids and spans embed it
+        py = f"{sys.version_info[0]}.{sys.version_info[1]}"
+        prefix = f"{_CACHE_VERSION}|{_PARSER_STAMP}|{py}|{lang}|{rel.as_posix()}|"
+        h = _hasher(prefix.encode("utf-8"))
+        h.update(text.encode("utf-8", errors="ignore"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[ModuleIR]:
+        try:
+            blob = (self.directory / f"{key}.pkl").read_bytes()
+        except OSError:
+            return None
+        mac, payload = blob[:_MAC_SIZE], blob[_MAC_SIZE:]
+        if not hmac.compare_digest(mac, _mac(key, payload)):
+            return None
+        try:
+            module = pickle.loads(payload)
+        except Exception:
+            return None
+        return module if isinstance(module, ModuleIR) else None
+
+    def set(self, key: str, module: ModuleIR) -> None:
+        if module.degraded:
+            # A fallback (e.g. tree-sitter missing) would outlive the condition that caused it
+            return
+        p = self.directory / f"{key}.pkl"
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            payload = pickle.dumps(module, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.write_bytes(_mac(key, payload) + payload)
+            os.replace(tmp, p)
+        except Exception:
+            pass
+
+def open_module_cache(directory: str | Path | None) -> Optional[ModuleCache]:
+    """ModuleCache for `directory`, or None when disabled or the directory isn't writable."""
+    if not directory:
+        return None
+    try:
+        return ModuleCache(directory)
+    except Exception:
+        return None
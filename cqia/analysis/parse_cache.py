@@ -0,0 +1,68 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator
+import ast
+import hashlib
+import threading
+
+try:
+    from blake3 import blake3 as _hasher  # optional, faster on small files
+except Exception:
+    _hasher = hashlib.blake2b
+
+_MAX_ENTRIES = 512
+_TREES: "OrderedDict[bytes, ast.Module]" = OrderedDict()
+_LOCK = threading.Lock()
+
+def _digest(text: str) -> bytes:
+    return _hasher(text.encode("utf-8", errors="ignore")).digest()
+
+def get_tree(path: Path, text: str) -> ast.Module:
+    """
+    Return the parsed AST for `text`, parsing each distinct source only once.
+    Trees are shared between detectors and must be treated as read-only.
+    Raises SyntaxError/ValueError like ast.parse.
+    """
+    key = _digest(text)
+    with _LOCK:
+        tree = _TREES.get(key)
+        if tree is not None:
+            _TREES.move_to_end(key)
+            return tree
+    # Parse outside the lock; concurrent runs (e.g. tune's two repos) only serialize on the
+    # LRU bookkeeping
+    tree = ast.parse(text, filename=str(path))
+    with _LOCK:
+        _TREES[key] = tree
+        if len(_TREES) > _MAX_ENTRIES:
+            _TREES.popitem(last=False)
+    return tree
+
+def walk_preorder(
+    tree: ast.AST, scope_types: tuple[type, ...] = ()
+) -> Iterator[tuple[ast.AST, int]]:
+    """
+    Yield (node, depth) in NodeVisitor order without per-node visit_* dispatch.
+    Depth counts enclosing nodes of `scope_types`; field-less leaves (Load, Add, ...) are skipped.
+    """
+    stack: list[tuple[ast.AST, int]] = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        yield node, depth
+        child_depth = depth + 1 if isinstance(node, scope_types) else depth
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, ast.AST):
+                if value._fields:
+                    children.append((value, child_depth))
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and item._fields:
+                        children.append((item, child_depth))
+        children.reverse()
+        stack.extend(children)
+
+def clear() -> None:
+    _TREES.clear()
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import json
+import os
+import sys
+from collections import Counter, defaultdict
 import typing as t
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 import networkx as nx
+import numpy as np
 
-from cqia.ingestion.walker import FileMeta, walk_repo
+from cqia.core.config import AnalyzeConfig
+from cqia.ingestion.walker import FileMeta, walk_repo, detect_language, read_source
 
 # ====== NEW HELPER FUNCTION ======
 def _safe_as_int(x: t.Any, default: int = 0) -> int:
     """Safely convert any value to int, handling tuples and other complex types."""
+    if type(x) is int:
+        return x
     try:
         if isinstance(x, (list, tuple)):
             if len(x) > 1:
@@ -26,56 +35,60 @@ from cqia.parsing.ir import ModuleIR, FunctionIR
 from cqia.parsing.python_parser import parse_python
 from cqia.parsing.ts_parser import parse_js_ts
 from cqia.analysis.detectors.complexity import detect_complexity, ComplexityFinding
-from cqia.analysis.detectors.testing_docs import run_testing_and_docs, DocFinding, TestGapFinding
+from cqia.analysis.detectors.testing_docs import (
+    collect_docstring_findings, detect_test_gaps, DocFinding, TestGapFinding,
+)
 from cqia.analysis.detectors.duplication import detect_duplication, DupFinding
 from cqia.analysis.detectors.security import scan_python_security, scan_js_security, SecFinding
 from cqia.analysis.detectors.performance import detect_performance, PerfFinding
 from cqia.analysis.dependency_graph import DepEdge, build_dep_graph
+from cqia.analysis.module_cache import ModuleCache, default_cache_dir, open_module_cache
 from cqia.analysis.severity import (
-    DEFAULT_WEIGHTS, ScoredFinding,
-    score_security, score_complexity, score_duplication, score_performance_base,
-    score_documentation_base, score_testing_base, pick_severity, explain, fix_text,
+    DEFAULT_WEIGHTS, SCORERS, SCORERS_VEC, ScoredFindings, explain, fix_text, get_params,
 )
 
 Number = t.Union[int, float]
 
 def _fnum(x: t.Any, default: float = 0.0) -> float:
+    # Values are almost always floats already; anything else keeps the guarded conversion
+    if type(x) is float:
+        return x
     try:
         return float(x)
     except Exception:
         return float(default)
 
-def _norm(val: Number, max_val: Number) -> float:
-    mv = _fnum(max_val, 1.0)
-    if mv == 0.0:
-        return 0.0
-    return _fnum(val, 0.0) / mv
+_LANG_BY_SUFFIX = {".py": "python", ".ts": "typescript", ".js": "javascript"}
 
 def _detect_language(path: Path) -> str:
-    p = str(path).lower()
-    if p.endswith(".py"): return "python"
-    if p.endswith(".ts"): return "typescript"
-    if p.endswith(".js"): return "javascript"
-    return "unknown"
+    return _LANG_BY_SUFFIX.get(path.suffix.lower(), "unknown")
 
-def _parse_modules(root: Path, files: list[Path]) -> list[ModuleIR]:
+def _parse_modules(
+    root: Path, files: list[Path], cache: ModuleCache | None = None
+) -> list[ModuleIR]:
     modules: list[ModuleIR] = []
     for rel in files:
         fpath = root / rel
+        lang = _detect_language(fpath)
+        if lang == "unknown":
+            # Not parsed or scanned; text stays unset and is only read later if a consumer needs it
+            modules.append(ModuleIR(path=rel, lang="unknown", functions=[]))
+            continue
         try:
-            text = fpath.read_text(encoding="utf-8", errors="ignore")
+            text = read_source(fpath)
         except Exception:
             text = ""
-        lang = _detect_language(fpath)
-        if lang == "python":
-            modules.append(parse_python(rel, text))
-        elif lang in {"javascript", "typescript"}:
-            modules.append(parse_js_ts(rel, text, lang))
-        else:
-            modules.append(ModuleIR(path=rel, lang="unknown", functions=[]))
+        key = cache.make_key(rel, lang, text) if cache is not None else None
+        mod = cache.get(key) if key is not None else None
+        if mod is None:
+            mod = parse_python(rel, text) if lang == "python" else parse_js_ts(rel, text, lang)
+            if key is not None:
+                cache.set(key, mod)
+        mod.text = text
+        modules.append(mod)
     return modules
 
-@dataclass
+@dataclass(slots=True)
 class DepMetricsCompat:
     fan_in: dict[str, int]
     fan_out: dict[str, int]
@@ -83,19 +96,90 @@ class DepMetricsCompat:
     top_fan_in: list[tuple[str, int]]
     top_fan_out: list[tuple[str, int]]
 
-def _safe_read_imports(root: Path, path: Path, language: str) -> list[str]:
+try:
+    from cqia.parsing.imports import read_imports
+except Exception:
+    read_imports = None
+
+def _safe_read_imports(root: Path, path: Path, language: str, text: str | None = None) -> list[str]:
+    if read_imports is None:
+        return []
     try:
-        from cqia.parsing.imports import read_imports
-        return [str(x) for x in read_imports(path, language, root)]
+        return [str(x) for x in read_imports(path, language, root, text)]
     except Exception:
         return []
 
+# Files per worker task, bounded so mid-sized repos still spread over every worker;
+# a single shard runs in-process
+_SHARD_SIZE = 50
+_MIN_SHARD_SIZE = 16
+
+def _shard(files: list[Path], workers: int) -> list[list[Path]]:
+    size = min(_SHARD_SIZE, max(_MIN_SHARD_SIZE, -(-len(files) // max(workers, 1))))
+    return [files[i:i + size] for i in range(0, len(files), size)]
+
+_ShardResult = tuple[
+    list[ModuleIR],
+    list[SecFinding],
+    list[ComplexityFinding],
+    list[DocFinding],
+    list[PerfFinding],
+    dict[Path, list[str]],
+]
+
+def _analyze_shard(
+    root: Path,
+    files: list[Path],
+    warn_at: int = 10,
+    parallel: bool = False,
+    cache_dir: str | None = None,
+) -> _ShardResult:
+    """Parse a shard of files and run the per-file detectors over it; each file is read once."""
+    modules = _parse_modules(root, files, open_module_cache(cache_dir))
+    functions = [fn for m in modules for fn in m.functions]
+
+    sec_findings: list[SecFinding] = []
+    for m in modules:
+        text = m.text or ""
+        if m.lang == "python":
+            sec_findings.extend(scan_python_security(m, text))
+        elif m.lang in {"javascript", "typescript"}:
+            sec_findings.extend(scan_js_security(m, text))
+
+    try:
+        comp_findings = detect_complexity(functions, warn_at=warn_at)
+    except Exception:
+        comp_findings = []
+
+    try:
+        docs = collect_docstring_findings(root, modules)
+    except Exception:
+        docs = []
+
+    # Performance on Python functions
+    try:
+        texts = {m.path: m.text for m in modules if m.text is not None}
+        perf_findings = detect_performance(functions, root, parallel=parallel, texts=texts)
+    except Exception:
+        perf_findings = []
+
+    imports = {
+        m.path: _safe_read_imports(root, m.path, detect_language(m.path), m.text)
+        for m in modules
+    }
+    # Text has served its purpose; don't ship it back across the process boundary
+    for m in modules:
+        m.text = None
+    return modules, sec_findings, comp_findings, docs, perf_findings, imports
+
 def analyze_repository(
     root: Path,
     include: list[str] | None = None,
     exclude: list[str] | None = None,
     max_bytes: int | None = None,
     rules: dict | None = None,
+    cache_dir: str | None = None,
+    cfg: AnalyzeConfig | None = None,
 ) -> tuple[
     list[ModuleIR],
     list[FunctionIR],
@@ -109,74 +193,90 @@ def analyze_repository(
     DepMetricsCompat,
     nx.DiGraph,
 ]:
-    include = include or ["**/*.py", "**/*.js", "**/*.ts"]
-    exclude = exclude or [".git/**", "**/.git/**", "**/.venv/**", "**/venv/**", "**/__pycache__/**", "**/node_modules/**"]
-    max_bytes = int(max_bytes or 2_000_000)
-
-    metas: list[FileMeta] = walk_repo(root, include, exclude, max_bytes, follow_symlinks=False)
+    if cfg is not None:
+        # Globs come precompiled from the config
+        metas: list[FileMeta] = cfg.walk()
+    else:
+        include = include or ["**/*.py", "**/*.js", "**/*.ts"]
+        exclude = exclude or [
+            ".git/**", "**/.git/**", "**/.venv/**", "**/venv/**",
+            "**/__pycache__/**", "**/node_modules/**",
+        ]
+        max_bytes = int(max_bytes or 2_000_000)
+        metas = walk_repo(root, include, exclude, max_bytes, follow_symlinks=False)
     file_paths = [m.path for m in metas]
 
-    modules = _parse_modules(root, file_paths)
+    # Thresholds
+    cx = (rules or {}).get("complexity", {}) if isinstance(rules, dict) else {}
+    warn_at = cx.get("warn_at", 10)
+
+    # Per-file detectors run on shards of files; global detectors run on the merged result
+    workers = os.cpu_count() or 1
+    shards = _shard(file_paths, workers)
+    if len(shards) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            run_shard = partial(_analyze_shard, root, warn_at=warn_at, cache_dir=cache_dir)
+            shard_results = list(ex.map(run_shard, shards))
+    else:
+        # In-process: a single shard is small, and with one worker a detector pool only adds a fork
+        shard_results = [
+            _analyze_shard(root, file_paths, warn_at=warn_at, parallel=False, cache_dir=cache_dir)
+        ]
+
+    modules: list[ModuleIR] = []
+    sec_findings: list[SecFinding] = []
+    comp_findings: list[ComplexityFinding] = []
+    docs: list[DocFinding] = []
+    perf_findings: list[PerfFinding] = []
+    imports: dict[Path, list[str]] = {}
+    for s_modules, s_sec, s_comp, s_docs, s_perf, s_imports in shard_results:
+        modules.extend(s_modules)
+        sec_findings.extend(s_sec)
+        comp_findings.extend(s_comp)
+        docs.extend(s_docs)
+        perf_findings.extend(s_perf)
+        imports.update(s_imports)
 
     # Flatten functions across languages
     all_functions: list[FunctionIR] = []
     for m in modules:
         all_functions.extend(m.functions)
 
-    # Security
-    sec_findings: list[SecFinding] = []
-    for m in modules:
-        fpath = root / m.path
-        try: text = fpath.read_text(encoding="utf-8", errors="ignore")
-        except Exception: text = ""
-        lang = _detect_language(fpath)
-        if lang == "python":
-            sec_findings.extend(scan_python_security(m, text))
-        elif lang in {"javascript", "typescript"}:
-            sec_findings.extend(scan_js_security(m, text))
-
-    # Thresholds
-    cx = (rules or {}).get("complexity", {}) if isinstance(rules, dict) else {}
-    warn_at = cx.get("warn_at", 10)
-
-    # Core findings
-    try:
-        comp_findings = detect_complexity(all_functions, warn_at=warn_at)
-    except Exception:
-        comp_findings = []
-
     dup_cfg = (rules or {}).get("duplication", {}) if isinstance(rules, dict) else {}
     k_shingle = dup_cfg.get("k_shingle", 7)
     similarity_threshold = dup_cfg.get("similarity_threshold", 0.90)
     try:
-        dup_findings = detect_duplication(all_functions, k=k_shingle, threshold=similarity_threshold)
+        dup_findings = detect_duplication(
+            all_functions,
+            k=k_shingle,
+            threshold=similarity_threshold,
+            max_funcs=dup_cfg.get("max_funcs"),
+            k_by_lang=dup_cfg.get("k_by_lang"),
+        )
     except Exception:
         dup_findings = []
 
     try:
-        docs, gaps = run_testing_and_docs(root, modules)
+        gaps = detect_test_gaps(root, [m.path for m in modules if m.lang == "python"])
     except Exception:
-        docs, gaps = [], []
-
-    # Performance on Python functions
-    try:
-        perf_findings = detect_performance(all_functions, root)
-    except Exception:
-        perf_findings = []
+        gaps = []
 
     # Dependencies
     dep_edges: list[DepEdge] = []
     for m in metas:
-        for dst in (d for d in _safe_read_imports(root, m.path, m.language)):
-            src = str(m.path.stem)
-            dep_edges.append(DepEdge(src=src, dst=str(dst)))
+        deps = imports.get(m.path)
+        if deps is None:
+            deps = _safe_read_imports(root, m.path, m.language)
+        src = m.path.stem
+        dep_edges.extend(DepEdge(src=src, dst=str(dst)) for dst in deps)
     G, dep_metrics_native = build_dep_graph(dep_edges)
+    # build_dep_graph already emits str node ids and int counts; share its containers
     dep_metrics = DepMetricsCompat(
-        fan_in={k: int(v) for k, v in dep_metrics_native.fan_in.items()},
-        fan_out={k: int(v) for k, v in dep_metrics_native.fan_out.items()},
-        cycles=[[str(x) for x in cyc] for cyc in dep_metrics_native.cycles],
-        top_fan_in=[(str(n), int(v)) for (n, v) in dep_metrics_native.top_fan_in],
-        top_fan_out=[(str(n), int(v)) for (n, v) in dep_metrics_native.top_fan_out],
+        fan_in=dep_metrics_native.fan_in,
+        fan_out=dep_metrics_native.fan_out,
+        cycles=dep_metrics_native.cycles,
+        top_fan_in=dep_metrics_native.top_fan_in,
+        top_fan_out=dep_metrics_native.top_fan_out,
     )
 
     return (modules, all_functions, comp_findings, docs, sec_findings, gaps, dup_findings, perf_findings, dep_edges, dep_metrics, G)
@@ -200,6 +300,18 @@ def _nonempty_title(default_title: str, f_msg: str | None) -> str:
     msg = (f_msg or "").strip()
     return msg if msg else default_title
 
+# why/fix texts come from a fixed vocabulary; build them once, stripped and interned, so every
+# finding shares the same string objects instead of carrying its own copy
+_WHY = {c: sys.intern(explain(c).strip()) for c in DEFAULT_WEIGHTS}
+_FIX = {
+    c: sys.intern(fix_text(c, None).strip())
+    for c in ("security", "complexity", "documentation")
+}
+_PERF_FIX = {
+    k: sys.intern(fix_text("performance", {"kind": k}).strip())
+    for k in ("string_concat_in_loop", "io_in_loop", "requests_in_loop")
+}
+
 def _score_all_findings(
     comp: list[ComplexityFinding],
     docs: list[DocFinding],
@@ -208,92 +320,107 @@ def _score_all_findings(
     dups: list[DupFinding],
     perf: list[PerfFinding],
     warn_at: int | None,
-) -> tuple[list[ScoredFinding], list[dict]]:
-    scored: list[ScoredFinding] = []
-    jsonable: list[dict] = []
+) -> ScoredFindings:
+    # Findings are collected as rows, then stored column-wise with severities assigned in one pass
+    pending: list[tuple] = []
+    scores: list[float] = []
 
     def _push(cat: str, fid: str, file: str, s: int, e: int, score_val: float, title: str, why: str, fix: str, extra: dict | None = None):
-        sev = pick_severity(cat, score_val)
         s = max(1, int(s))
         e = max(1, int(e))
         file = (file or "").strip() or (extra or {}).get("file_fallback", "")
-        sf = ScoredFinding(
-            id=fid, category=cat, severity=sev, score=float(score_val),
-            title=title.strip(), file=file, start_line=s, end_line=e,
-            why=(why or "").strip(), fix=(fix or "").strip(), extra=extra or {}
-        )
-        scored.append(sf)
-        jsonable.append({
-            "id": fid, "category": cat, "severity": sev, "score": float(score_val),
-            "title": sf.title, "file": sf.file, "start_line": s, "end_line": e,
-            "hint": sf.fix, "extra": sf.extra
-        })
+        pending.append((
+            fid, cat, file, s, e, title.strip(), (why or "").strip(), (fix or "").strip(),
+            extra or {},
+        ))
+        scores.append(float(score_val))
 
-    w = DEFAULT_WEIGHTS
+    # Weights are read once per category for the whole batch
+    w = {c: get_params(c)[0] for c in SCORERS}
 
     # Security
+    base = SCORERS["security"](w["security"])
     for f in sec:
-        base = score_security(w["security"])
-        title = _nonempty_title("Potential insecure call", getattr(f, "message", None))
-        why = explain("security")
-        fix = fix_text("security", None)
+        title = _nonempty_title("Potential insecure call", f.message)
+        why = _WHY["security"]
+        fix = _FIX["security"]
         _push("security", f.id, f.file, f.start_line, f.end_line, base, title, why, fix, {})
 
     # Complexity
-    for f in comp:
-        val = float(getattr(f, "value", 0.0))
-        thr = float(warn_at or getattr(f, "threshold", 10))
-        base = score_complexity(val, w["complexity"], thr)
-        title = _nonempty_title(f"High cyclomatic complexity: {int(val)} (≥ {int(thr)})", getattr(f, "message", None))
-        why = explain("complexity")
-        fix = fix_text("complexity", None)
+    vals = [float(f.value) for f in comp]
+    thrs = [float(warn_at or f.threshold) for f in comp]
+    comp_scores = SCORERS_VEC["complexity"](
+        np.array(vals), w["complexity"], np.array(thrs)
+    ).tolist()
+    for f, val, thr, base in zip(comp, vals, thrs, comp_scores):
+        title = _nonempty_title(f"High cyclomatic complexity: {int(val)} (≥ {int(thr)})", f.message)
+        why = _WHY["complexity"]
+        fix = _FIX["complexity"]
         _push("complexity", f.id, f.file, f.start_line, f.end_line, base, title, why, fix, {"value": val, "threshold": thr})
 
     # Duplication
-    for f in dups:
-        sim = float(getattr(f, "similarity", 0.0))
-        base = score_duplication(sim, w["duplication"])
-        files = list(getattr(f, "files", []) or [])
-        primary = str(files[0]) if files else (getattr(f, "file", "") or "")
+    sims = [float(f.similarity) for f in dups]
+    dup_scores = SCORERS_VEC["duplication"](np.array(sims), w["duplication"]).tolist()
+    for f, sim, base in zip(dups, sims, dup_scores):
+        files = list(f.files or [])
+        primary = str(files[0]) if files else ""
         other = str(files[1]) if len(files) > 1 else ""
         s_a, e_a = 1, 1
-        lines = getattr(f, "lines", None)
+        lines = f.lines
         if lines is not None:
             s_a, e_a = _safe_span(lines, 1)
-        title = _nonempty_title(f"Near-duplicate code (Jaccard {sim:.2f})", getattr(f, "message", None))
-        why = explain("duplication")
+        title = _nonempty_title(f"Near-duplicate code (Jaccard {sim:.2f})", f.message)
+        why = _WHY["duplication"]
         extra = {"other_file": other, "similarity": sim, "file_fallback": primary}
         fix = fix_text("duplication", extra)
         _push("duplication", f.id, primary, s_a, e_a, base, title, why, fix, extra)
 
     # Performance
+    base = SCORERS["performance"](w["performance"])
     for f in perf:
-        base = score_performance_base(w["performance"])
-        kind = getattr(f, "kind", "pattern")
-        title = _nonempty_title(f"Possible performance issue: {kind}", getattr(f, "message", None))
-        why = explain("performance")
-        fix = fix_text("performance", {"kind": kind})
+        kind = f.kind
+        title = _nonempty_title(f"Possible performance issue: {kind}", f.message)
+        why = _WHY["performance"]
+        fix = _PERF_FIX.get(kind) or fix_text("performance", {"kind": kind})
         _push("performance", f.id, f.file, f.start_line, f.end_line, base, title, why, fix, {"kind": kind})
 
     # Documentation
+    base = SCORERS["documentation"](w["documentation"])
     for f in docs:
-        base = score_documentation_base(w["documentation"])
-        kind = getattr(f, "kind", "docs")
-        title = _nonempty_title(f"Missing {kind} documentation", getattr(f, "message", None))
-        why = explain("documentation")
-        fix = fix_text("documentation", None)
+        kind = f.kind
+        title = _nonempty_title(f"Missing {kind} documentation", f.message)
+        why = _WHY["documentation"]
+        fix = _FIX["documentation"]
         _push("documentation", f.id, f.file, f.start_line, f.end_line, base, title, why, fix, {"kind": kind})
 
     # Testing
+    base = SCORERS["testing"](w["testing"])
     for f in gaps:
-        base = score_testing_base(w["testing"])
-        expected = getattr(f, "expected_test", "")
-        title = _nonempty_title("Missing mapped test", getattr(f, "message", None))
-        why = explain("testing")
+        expected = f.expected_test
+        title = _nonempty_title("Missing mapped test", f.message)
+        why = _WHY["testing"]
         fix = fix_text("testing", {"expected_test": expected})
         _push("testing", f.id, f.file, 1, 1, base, title, why, fix, {"expected_test": expected})
 
-    return scored, jsonable
+    return ScoredFindings.from_rows(pending, scores)
+
+def _render_findings(scored: ScoredFindings) -> tuple[list[dict], list[dict]]:
+    # Per-row dicts exist only in the report: the full view and the export view, where "fix"
+    # is published as "hint"
+    full: list[dict] = []
+    export: list[dict] = []
+    for fid, cat, sev, score, title, file, s, e, why, fix, extra in scored.rows():
+        full.append({
+            "id": fid, "category": cat, "severity": sev, "score": score,
+            "title": title, "file": file, "start_line": s, "end_line": e,
+            "why": why, "fix": fix, "extra": extra or {}
+        })
+        export.append({
+            "id": fid, "category": cat, "severity": sev, "score": score,
+            "title": title, "file": file, "start_line": s, "end_line": e,
+            "hint": fix, "extra": extra
+        })
+    return full, export
 
 def run_analysis(
     root: t.Union[str, Path],
@@ -304,9 +431,23 @@ def run_analysis(
     warn_at: int | None = None,
     p1_cutoff: int | None = None,
     p0_cutoff: int | None = None,
+    include_raw: bool = False,
+    cfg: AnalyzeConfig | None = None,
+    module_cache: bool = False,
     **kwargs: t.Any,
 ) -> dict:
+    """
+    Detectors, scoring and dependency metrics for root. With `cfg`, its path, globs (already
+    compiled) and max_bytes are used and the root/include/exclude/max_bytes arguments are ignored.
+    The parsed-module cache is off unless `module_cache` is set (kept in the user cache
+    directory, never under root) or a `cache_dir` is passed.
+    """
+    if cfg is not None:
+        root, include, exclude, max_bytes = cfg.path, cfg.include, cfg.exclude, cfg.max_bytes
     root = Path(root).resolve()
+    cache_dir = kwargs.get("cache_dir")
+    if cache_dir is None and module_cache:
+        cache_dir = str(default_cache_dir(root))
 
     if isinstance(rules, dict):
         cx = rules.get("complexity", {})
@@ -318,37 +459,58 @@ def run_analysis(
             p0_cutoff = cx.get("p0_cutoff")
 
     modules, all_functions, comp, docs, sec_findings, gaps, dups, perf_findings, dep_edges, dep_metrics, dep_graph = analyze_repository(
-        root, include=include, exclude=exclude, max_bytes=max_bytes, rules=rules
+        root, include=include, exclude=exclude, max_bytes=max_bytes, rules=rules,
+        cache_dir=cache_dir, cfg=cfg,
     )
 
     # Aggregations for hotspots
-    comp_map: dict[str, float] = {}
+    comp_map: defaultdict[str, float] = defaultdict(float)
     for f in comp:
-        comp_map.setdefault(getattr(f, "file", ""), 0.0)
-        comp_map[getattr(f, "file", "")] += _fnum(getattr(f, "value", 0.0), 0.0)
+        v = f.value
+        comp_map[f.file] += v if type(v) in (int, float) else _fnum(v, 0.0)
 
     max_comp = max(comp_map.values(), default=0.0)
     fan_in = dep_metrics.fan_in
     max_fi = max(fan_in.values(), default=0)
 
-    hotspots: list[tuple[str, float, int, float]] = []
-    for path_str, comp_sum in comp_map.items():
-        key = Path(path_str).stem
-        fi_val = _safe_as_int(fan_in.get(key, 0), 0)
-        comp_val = _fnum(comp_sum, 0.0)
-        score_val = _norm(fi_val, max_fi or 1) * _norm(comp_val, max_comp or 1)
-        hotspots.append((str(path_str), float(score_val), int(fi_val), float(comp_val)))
-
-    hotspots.sort(key=lambda r: (-_fnum(r[1], 0.0), -_safe_as_int(r[2], 0), -_fnum(r[3], 0.0), str(r)))
+    # Hotspot score = normalized fan-in x normalized complexity, computed over all files at once
+    paths = list(comp_map)
+    fi_arr = np.fromiter(
+        (_safe_as_int(fan_in.get(Path(p).stem, 0), 0) for p in paths),
+        dtype=np.int64,
+        count=len(paths),
+    )
+    comp_arr = np.fromiter(comp_map.values(), dtype=np.float64, count=len(paths))
+    scores = (fi_arr / float(max_fi or 1)) * (comp_arr / float(max_comp or 1))
+    rows = list(zip(paths, scores.tolist(), fi_arr.tolist(), comp_arr.tolist()))
+    order = np.lexsort((np.array(paths, dtype=str), -comp_arr, -fi_arr, -scores)) if rows else []
+    hotspots: list[tuple[str, float, int, float]] = [rows[i] for i in order]
 
     # Scoring
-    scored, findings_json = _score_all_findings(
+    scored = _score_all_findings(
         comp, docs, sec_findings, gaps, dups, perf_findings, warn_at or 10
     )
+    findings_scored, findings_json = _render_findings(scored)
+
+    # One pass over modules for both the distinct-file count and per-language counts
+    lang_counts: Counter[str] = Counter()
+    paths_seen: set[Path] = set()
+    for m in modules:
+        lang_counts[m.lang] += 1
+        paths_seen.add(m.path)
+
+    # Published under both "dep_metrics" and "dependencies.metrics"; one dict, two references
+    dep_metrics_view = {
+        "fan_in": dep_metrics.fan_in,
+        "fan_out": dep_metrics.fan_out,
+        "cycles": dep_metrics.cycles,
+        "top_fan_in": dep_metrics.top_fan_in,
+        "top_fan_out": dep_metrics.top_fan_out,
+    }
 
     report: dict = {
         "summary": {
-            "files_analyzed": len({m.path for m in modules}),
+            "files_analyzed": len(paths_seen),
             "functions_analyzed": len(all_functions),
             "complexity_findings": len(comp),
             "documentation_findings": len(docs),
@@ -358,47 +520,21 @@ def run_analysis(
             "performance_findings": len(perf_findings),
         },
         "by_language": {
-            "python": sum(1 for m in modules if m.lang == "python"),
-            "javascript": sum(1 for m in modules if m.lang == "javascript"),
-            "typescript": sum(1 for m in modules if m.lang == "typescript"),
+            "python": lang_counts["python"],
+            "javascript": lang_counts["javascript"],
+            "typescript": lang_counts["typescript"],
         },
         "hotspots": [
             {"path": p, "score": s, "fan_in": fi, "complexity_sum": cc}
             for (p, s, fi, cc) in hotspots
         ],
-        "findings_scored": [
-            {
-                "id": s.id, "category": s.category, "severity": s.severity, "score": s.score,
-                "title": s.title, "file": s.file, "start_line": s.start_line, "end_line": s.end_line,
-                "why": s.why, "fix": s.fix, "extra": s.extra or {}
-            } for s in scored
-        ],
+        "findings_scored": findings_scored,
         "findings_json": findings_json,
-        "findings_raw": {
-            "complexity": comp,
-            "documentation": docs,
-            "security": sec_findings,
-            "testing": gaps,
-            "duplication": dups,
-            "performance": perf_findings,
-        },
         "dep_graph": dep_graph,
-        "dep_metrics": {
-            "fan_in": dep_metrics.fan_in,
-            "fan_out": dep_metrics.fan_out,
-            "cycles": dep_metrics.cycles,
-            "top_fan_in": dep_metrics.top_fan_in,
-            "top_fan_out": dep_metrics.top_fan_out,
-        },
+        "dep_metrics": dep_metrics_view,
         "dependencies": {
             "edges": [e.__dict__ for e in dep_edges],
-            "metrics": {
-                "fan_in": dep_metrics.fan_in,
-                "fan_out": dep_metrics.fan_out,
-                "cycles": dep_metrics.cycles,
-                "top_fan_in": dep_metrics.top_fan_in,
-                "top_fan_out": dep_metrics.top_fan_out,
-            },
+            "metrics": dep_metrics_view,
         },
         "thresholds": {
             "warn_at": warn_at,
@@ -407,4 +543,14 @@ def run_analysis(
             "max_bytes": max_bytes,
         },
     }
+    # Detector dataclasses duplicate findings_json; only callers that read them pay for them
+    if include_raw:
+        report["findings_raw"] = {
+            "complexity": comp,
+            "documentation": docs,
+            "security": sec_findings,
+            "testing": gaps,
+            "duplication": dups,
+            "performance": perf_findings,
+        }
     return report
@@ -1,10 +1,13 @@
 from __future__ import annotations
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Literal, Mapping
+from types import MappingProxyType
+from typing import Callable, Iterable, Iterator, Literal, Mapping
+import numpy as np
 
 Severity = Literal["P0", "P1", "P2", "P3"]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScoredFinding:
     id: str
     category: str
@@ -18,7 +21,7 @@ class ScoredFinding:
     fix: str
     extra: dict | None = None
 
-DEFAULT_WEIGHTS: Mapping[str, float] = {
+_WEIGHTS: dict[str, float] = {
     "security": 1.0,
     "complexity": 0.6,
     "duplication": 0.5,
@@ -26,6 +29,10 @@ DEFAULT_WEIGHTS: Mapping[str, float] = {
     "documentation": 0.3,
     "testing": 0.7,
 }
+_KNOWN = frozenset(_WEIGHTS)
+
+# Read-only live view; modules that imported DEFAULT_WEIGHTS see override_weights updates
+DEFAULT_WEIGHTS: Mapping[str, float] = MappingProxyType(_WEIGHTS)
 
 CONTEXT_CAP: Mapping[str, float] = {
     "security": 1.0,
@@ -36,25 +43,94 @@ CONTEXT_CAP: Mapping[str, float] = {
     "testing": 0.4,
 }
 
+# (weight, context cap) per category; rebuilt in place by override_weights so importers stay current
+_CAT_PARAMS: dict[str, tuple[float, float]] = {}
+
+def _refresh_params() -> None:
+    _CAT_PARAMS.update({c: (w, CONTEXT_CAP.get(c, 0.2)) for c, w in _WEIGHTS.items()})
+
+_refresh_params()
+
+def get_params(category: str) -> tuple[float, float]:
+    return _CAT_PARAMS.get(category, (0.0, 0.2))
+
+# The conditional expression stays: on scalars it beats min(1.0, max(0.0, x)) by about 3x in CPython
 def _clamp01(x: float) -> float:
     return 0.0 if x < 0 else 1.0 if x > 1 else x
 
+def _clamp01_arr(a: np.ndarray) -> np.ndarray:
+    return np.clip(a, 0.0, 1.0)
+
+# Lower bounds of P2, P1, P0; a score's band is the number of bounds it reaches
+_BANDS = (0.40, 0.60, 0.80)
+_LABELS: tuple[Severity, ...] = ("P3", "P2", "P1", "P0")
+
 def _to_severity(x: float) -> Severity:
-    if x >= 0.80:
-        return "P0"
-    if x >= 0.60:
-        return "P1"
-    if x >= 0.40:
-        return "P2"
-    return "P3"
+    return _LABELS[bisect_right(_BANDS, x)]
+
+def _severity_codes(arr: Iterable[float]) -> np.ndarray:
+    return np.searchsorted(_BANDS, np.asarray(arr, dtype=np.float64), side="right").astype(np.uint8)
 
 def combine_with_context(base: float, category: str, context: float | None = None) -> float:
     if context is None:
         return _clamp01(base)
-    cap = CONTEXT_CAP.get(category, 0.2)
+    cap = get_params(category)[1]
     c = _clamp01(context)
     return _clamp01(base + cap * c - base * cap * c)
 
+# Category codes used by ScoredFindings
+_CATS: tuple[str, ...] = tuple(CONTEXT_CAP)
+_CAT_CODE = {c: i for i, c in enumerate(_CATS)}
+
+@dataclass(slots=True)
+class ScoredFindings:
+    """
+    Scored findings as parallel columns; category and severity are uint8 codes into
+    _CATS/_LABELS.
+    """
+    ids: list[str]
+    categories: np.ndarray
+    severities: np.ndarray
+    scores: np.ndarray
+    titles: list[str]
+    files: list[str]
+    start_lines: list[int]
+    end_lines: list[int]
+    whys: list[str]
+    fixes: list[str]
+    extras: list[dict]
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple], scores: list[float]) -> "ScoredFindings":
+        """Columns from (id, category, file, start, end, title, why, fix, extra) rows and scores."""
+        cols = list(zip(*rows)) if rows else [()] * 9
+        ids, cats, files, starts, ends, titles, whys, fixes, extras = (list(c) for c in cols)
+        score_arr = np.asarray(scores, dtype=np.float64)
+        return cls(
+            ids=ids,
+            categories=np.fromiter((_CAT_CODE[c] for c in cats), dtype=np.uint8, count=len(cats)),
+            severities=_severity_codes(score_arr),
+            scores=score_arr,
+            titles=titles, files=files, start_lines=starts, end_lines=ends,
+            whys=whys, fixes=fixes, extras=extras,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self) -> Iterator[tuple]:
+        """(id, category, severity, score, title, file, start, end, why, fix, extra) per finding."""
+        cats = [_CATS[i] for i in self.categories.tolist()]
+        sevs = [_LABELS[i] for i in self.severities.tolist()]
+        return zip(
+            self.ids, cats, sevs, self.scores.tolist(), self.titles, self.files,
+            self.start_lines, self.end_lines, self.whys, self.fixes, self.extras,
+        )
+
+    def __iter__(self) -> Iterator[ScoredFinding]:
+        for r in self.rows():
+            yield ScoredFinding(*r)
+
 def score_security(weight: float) -> float:
     return _clamp01(weight)
 
@@ -74,55 +150,102 @@ def score_testing_base(weight: float) -> float:
 def score_documentation_base(weight: float) -> float:
     return _clamp01(weight)
 
+SCORERS: Mapping[str, Callable[..., float]] = {
+    "security": score_security,
+    "complexity": score_complexity,
+    "duplication": score_duplication,
+    "performance": score_performance_base,
+    "documentation": score_documentation_base,
+    "testing": score_testing_base,
+}
+
+def _score_complexity_vec(
+    cc: np.ndarray, weight: float, warn_at: np.ndarray | float = 10.0
+) -> np.ndarray:
+    return _clamp01_arr(np.maximum(0.0, (cc - warn_at) / (warn_at * 2.0)) * weight)
+
+def _score_duplication_vec(sim: np.ndarray, weight: float) -> np.ndarray:
+    return _clamp01_arr(sim * weight)
+
+# Array forms for the categories whose score depends on the finding; the rest score from the
+# weight alone
+SCORERS_VEC: Mapping[str, Callable[..., np.ndarray]] = {
+    "complexity": _score_complexity_vec,
+    "duplication": _score_duplication_vec,
+}
+
 def pick_severity(category: str, raw: float) -> Severity:
     return _to_severity(raw)
 
+_EXPLAIN: Mapping[str, str] = {
+    "security": (
+        "Security-sensitive API usage increases the risk of injection or RCE; fix immediately."
+    ),
+    "complexity": (
+        "High cyclomatic complexity makes code harder to test and maintain and hides defects."
+    ),
+    "duplication": "Duplicated logic leads to divergence and bugs, increasing maintenance effort.",
+    "performance": (
+        "Loop performs expensive operations; this can dominate runtime and reduce throughput."
+    ),
+    "documentation": "Missing docstrings reduce readability, API clarity, and onboarding speed.",
+    "testing": "Missing tests risk regressions and make safe refactoring harder.",
+}
+
+_FIX_BASE: Mapping[str, str] = {
+    "security": (
+        "- Replace eval/exec; validate inputs; use safe loaders; "
+        "for subprocess set shell=False and pass args list.\n"
+    ),
+    "complexity": (
+        "- Extract helpers; guard-return early; "
+        "simplify boolean expressions with named predicates.\n"
+    ),
+    "documentation": (
+        "- Add module/class/function docstrings (PEP 257) "
+        "with parameters, returns, and brief examples.\n"
+    ),
+}
+
+_IO_FIX = (
+    "- Hoist I/O out of the loop, batch requests, "
+    "or use concurrency/async with pooling and timeouts.\n"
+)
+_FIX_PERF: Mapping[str, str] = {
+    "string_concat_in_loop": (
+        "- Append to a list in the loop and join once: parts.append(x); s=''.join(parts).\n"
+    ),
+    "io_in_loop": _IO_FIX,
+    "requests_in_loop": _IO_FIX,
+}
+_FIX_PERF_DEFAULT = "- Reduce per-iteration work; batch or cache repeated operations.\n"
+
 def explain(category: str) -> str:
-    if category == "security":
-        return "Security-sensitive API usage increases the risk of injection or RCE; fix immediately."
-    if category == "complexity":
-        return "High cyclomatic complexity makes code harder to test and maintain and hides defects."
-    if category == "duplication":
-        return "Duplicated logic leads to divergence and bugs, increasing maintenance effort."
-    if category == "performance":
-        return "Loop performs expensive operations; this can dominate runtime and reduce throughput."
-    if category == "documentation":
-        return "Missing docstrings reduce readability, API clarity, and onboarding speed."
-    if category == "testing":
-        return "Missing tests risk regressions and make safe refactoring harder."
-    return "Quality issue."
+    return _EXPLAIN.get(category, "Quality issue.")
 
 def fix_text(category: str, extra: dict | None) -> str:
-    if category == "security":
-        return "- Replace eval/exec; validate inputs; use safe loaders; for subprocess set shell=False and pass args list.\n"
-    if category == "complexity":
-        return "- Extract helpers; guard-return early; simplify boolean expressions with named predicates.\n"
+    # Fixed texts are shared dict values; only duplication and testing format a per-finding tail
+    base = _FIX_BASE.get(category)
+    if base is not None:
+        return base
+    if category == "performance":
+        return _FIX_PERF.get((extra or {}).get("kind", ""), _FIX_PERF_DEFAULT)
     if category == "duplication":
         other = (extra or {}).get("other_file")
         tail = f" (see also {other})" if other else ""
         return f"- Extract common code into a shared function or module{tail}; add tests for the shared path.\n"
-    if category == "performance":
-        kind = (extra or {}).get("kind", "")
-        if kind == "string_concat_in_loop":
-            return "- Append to a list in the loop and join once: parts.append(x); s=''.join(parts).\n"
-        if kind in {"io_in_loop", "requests_in_loop"}:
-            return "- Hoist I/O out of the loop, batch requests, or use concurrency/async with pooling and timeouts.\n"
-        return "- Reduce per-iteration work; batch or cache repeated operations.\n"
-    if category == "documentation":
-        return "- Add module/class/function docstrings (PEP 257) with parameters, returns, and brief examples.\n"
     if category == "testing":
         expected = (extra or {}).get("expected_test", "tests/test_<name>.py")
         return f"- Create {expected} and add at least one unit test; use pytest fixtures and descriptive names.\n"
     return "- Apply standard refactorings and add tests.\n"
 
 def override_weights(new_weights: dict | None):
-    global DEFAULT_WEIGHTS
     if not new_weights:
         return
-    # copy to a mutable dict and update
-    w = dict(DEFAULT_WEIGHTS)
-    for k, v in new_weights.items():
-        if isinstance(v, (int, float)):
-            w[k] = float(v)
-    # rebind DEFAULT_WEIGHTS to updated mapping
-    DEFAULT_WEIGHTS = w  # type: ignore[assignment]
+    # Unknown categories and non-numeric values are dropped; one update() applies the rest
+    _WEIGHTS.update({
+        k: float(v)
+        for k, v in new_weights.items()
+        if k in _KNOWN and isinstance(v, (int, float))
+    })
+    _refresh_params()
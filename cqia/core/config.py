@@ -1,7 +1,10 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+import re
+
+from cqia.ingestion.walker import FileMeta, compile_globs, matches_any, newest_mtime, walk_repo
 
 @dataclass
 class AnalyzeConfig:
@@ -11,7 +14,46 @@ class AnalyzeConfig:
     max_bytes: int
     output_dir: Path
     rules_path: Path | None = None  # NEW
+    _compiled_include: Optional[re.Pattern] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    _compiled_exclude: Optional[re.Pattern] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+
+    def __post_init__(self) -> None:
+        # Compiled once here; walk() hands them to walk_repo instead of the raw glob lists
+        self._compiled_include = compile_globs(self.include)
+        self._compiled_exclude = compile_globs(self.exclude)
+
+    def match(self, path: Path) -> bool:
+        """True when `path`, relative to the repo root, is included and not excluded."""
+        return matches_any(path, self._compiled_include) and not matches_any(
+            path, self._compiled_exclude
+        )
+
+    def walk(self, follow_symlinks: bool = False) -> list[FileMeta]:
+        return walk_repo(
+            self.path,
+            self.include,
+            self.exclude,
+            self.max_bytes,
+            follow_symlinks=follow_symlinks,
+            include_rx=self._compiled_include,
+            exclude_rx=self._compiled_exclude,
+        )
+
+    def newest_mtime(self, follow_symlinks: bool = False) -> int:
+        """Newest mtime (ns) among the files walk() would return and their directories."""
+        return newest_mtime(
+            self.path,
+            self.include,
+            self.exclude,
+            follow_symlinks=follow_symlinks,
+            include_rx=self._compiled_include,
+            exclude_rx=self._compiled_exclude,
+        )
 
     def resolve_output_dir(self) -> Path:
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        return self.output_dir
\ No newline at end of file
+        return self.output_dir
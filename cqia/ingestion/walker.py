@@ -1,7 +1,11 @@
 from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import os
+import re
 import fnmatch
 from typing import Optional
 
@@ -35,33 +39,220 @@ HARD_EXCLUDE_DIRS = {
     "dist", "build", ".next", ".turbo",
     ".idea", ".vscode",
     ".cache", ".pytest_cache",
+    ".cqia_cache",
 }
 
+def _read_bytes(path) -> bytes:
+    """Whole file via raw os.open/os.read, with no file object or buffering layer."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while chunk := os.read(fd, 1 << 20):
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+def read_source(path: Path) -> str:
+    """
+    Read a source file as UTF-8 (errors ignored) with raw os.read, skipping the TextIOWrapper layer.
+    Newlines are normalized the same way read_text's universal-newline mode does.
+    """
+    text = _read_bytes(path).decode("utf-8", "ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
 def detect_language(path: Path) -> str:
     return _DEFAULT_LANG_MAP.get(path.suffix.lower(), "unknown")
 
-def _compile_gitignore(root: Path, extra_excludes: list[str]) -> Optional[object]:
+def _language_of(rel: str) -> str:
+    """detect_language on a '/'-joined relative path string, with Path.suffix's rules."""
+    name = rel[rel.rfind("/") + 1:]
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return _DEFAULT_LANG_MAP.get(name[i:].lower(), "unknown")
+    return "unknown"
+
+# Compiled spec, literal ignored dir names and memoized match results per (root, excludes),
+# tagged with the .gitignore stat; a changed .gitignore drops all three together.
+# Least recently used roots are evicted past _MAX_GITIGNORE_ENTRIES.
+_MAX_GITIGNORE_ENTRIES = 8
+# A memo larger than this is cleared before its next walk instead of growing further
+_MAX_IGNORE_MEMO = 200_000
+_GITIGNORE_CACHE: OrderedDict[
+    tuple[Path, tuple[str, ...]],
+    tuple[tuple[int, int] | None, Optional[object], frozenset[str], dict[str, bool]],
+] = OrderedDict()
+
+def _literal_dir_names(lines: list[str]) -> frozenset[str]:
+    """Bare names (no wildcard, no slash but a trailing one) that ignore a directory at any depth.
+    Empty when any negation is present, since a later `!` line could re-include one."""
+    names: set[str] = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("!"):
+            return frozenset()
+        name = line[:-1] if line.endswith("/") else line
+        if name and name not in (".", "..") and not any(c in name for c in "*?[]\\/"):
+            names.add(name)
+    return frozenset(names)
+
+def _compile_gitignore(
+    root: Path, extra_excludes: list[str]
+) -> tuple[Optional[object], frozenset[str], dict[str, bool]]:
     if not _HAS_PATHSPEC:
-        return None
-    lines: list[str] = []
+        return None, frozenset(), {}
     gi = root / ".gitignore"
-    if gi.exists():
+    try:
+        st = gi.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    key = (root, tuple(extra_excludes or ()))
+    hit = _GITIGNORE_CACHE.get(key)
+    if hit is not None and hit[0] == stamp:
+        _GITIGNORE_CACHE.move_to_end(key)
+        memo = hit[3]
+        if len(memo) > _MAX_IGNORE_MEMO:
+            memo.clear()
+        return hit[1], hit[2], memo
+
+    lines: list[str] = []
+    if stamp is not None:
         try:
             lines.extend(gi.read_text(encoding="utf-8", errors="ignore").splitlines())
         except Exception:
             pass
     lines.extend(extra_excludes or [])
     try:
-        return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+        spec = pathspec.PathSpec.from_lines("gitwildmatch", lines)
+    except Exception:
+        spec = None
+    if spec is not None and not len(spec):
+        spec = None
+    literal = _literal_dir_names(lines) if spec is not None else frozenset()
+    memo: dict[str, bool] = {}
+    _GITIGNORE_CACHE[key] = (stamp, spec, literal, memo)
+    _GITIGNORE_CACHE.move_to_end(key)
+    if len(_GITIGNORE_CACHE) > _MAX_GITIGNORE_ENTRIES:
+        _GITIGNORE_CACHE.popitem(last=False)
+    return spec, literal, memo
+
+@lru_cache(maxsize=32)
+def _compile_glob_tuple(patterns: tuple[str, ...]) -> Optional[re.Pattern]:
+    unique = list(dict.fromkeys(os.path.normcase(p) for p in patterns))
+    if not unique:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in unique))
+
+def compile_globs(patterns: list[str]) -> Optional[re.Pattern]:
+    """One regex for a deduplicated glob list; same semantics as fnmatch.fnmatch on any of them.
+    Compiled once per distinct list, so repeated walks with the same globs reuse it."""
+    return _compile_glob_tuple(tuple(patterns or ()))
+
+def matches_any(path: Path, globs: Optional[re.Pattern]) -> bool:
+    return globs is not None and globs.match(os.path.normcase(path.as_posix())) is not None
+
+def _file_meta(entry: os.DirEntry, rel: str, max_bytes: int) -> Optional[FileMeta]:
+    try:
+        size = entry.stat().st_size
+    except FileNotFoundError:
+        return None
+    if size > max_bytes:
+        return None
+
+    # Count newlines on the raw bytes; nothing is decoded since only the count is kept
+    try:
+        data = _read_bytes(entry.path)
     except Exception:
         return None
+    lines = data.count(b"\n") + 1
+    if b"\r" in data:
+        # Lone CRs are line breaks too, as in read_text's universal-newline mode
+        lines += data.count(b"\r") - data.count(b"\r\n")
+
+    return FileMeta(
+        path=Path(rel),
+        bytes=int(size),
+        lines=int(lines),
+        language=_language_of(rel),
+    )
+
+# Below this many candidates the thread pool costs more than the overlapped I/O saves
+_PARALLEL_MIN_FILES = 64
+
+def _scan(
+    root: Path,
+    include: list[str],
+    exclude: list[str],
+    follow_symlinks: bool,
+    include_rx: Optional[re.Pattern],
+    exclude_rx: Optional[re.Pattern],
+    dirs: Optional[list[os.DirEntry]] = None,
+) -> list[tuple[os.DirEntry, str]]:
+    """(entry, '/'-joined relative path) of every candidate file; descended-into directories
+    are appended to `dirs` when given. root must already be resolved."""
+    spec, ignored_dirs, ignore_memo = _compile_gitignore(root, exclude)
+    # Literal directory names from the ignore lines are pruned like the hard excludes,
+    # without going through the pathspec machinery
+    skip_dirs = HARD_EXCLUDE_DIRS | ignored_dirs if ignored_dirs else HARD_EXCLUDE_DIRS
+    spec_match = spec.match_file if spec is not None else None
+    if exclude_rx is None:
+        exclude_rx = compile_globs(exclude)
+    if include_rx is None:
+        include_rx = compile_globs(include)
+    exclude_match = exclude_rx.match if exclude_rx is not None else None
+    include_match = include_rx.match if include_rx is not None else None
+    normcase = os.path.normcase
+    candidates: list[tuple[os.DirEntry, str]] = []
+
+    # Single-threaded scandir walk with pruning; relative paths are built by string join, so
+    # nothing is resolved per entry.
+    stack: list[tuple[str, str]] = [(str(root), "")]
+    while stack:
+        dirpath, dir_rel = stack.pop()
+        try:
+            it = os.scandir(dirpath)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                name = entry.name
+                try:
+                    # Same classification as os.walk: symlinks to directories count as directories
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir and name in skip_dirs:
+                    continue
+
+                rel = f"{dir_rel}/{name}" if dir_rel else name
+                if spec_match is not None:
+                    # Repeat walks of the same root reuse earlier pathspec verdicts
+                    ignored = ignore_memo.get(rel)
+                    if ignored is None:
+                        ignored = ignore_memo[rel] = spec_match(rel)
+                    if ignored:
+                        continue
+                # One normalized key per entry, matched against each combined glob regex
+                key = normcase(rel)
+                if exclude_match is not None and exclude_match(key):
+                    continue
+
+                if is_dir:
+                    if follow_symlinks or not entry.is_symlink():
+                        stack.append((entry.path, rel))
+                        if dirs is not None:
+                            dirs.append(entry)
+                    continue
 
-def _matches_any(path: Path, patterns: list[str]) -> bool:
-    s = str(path.as_posix())
-    for pat in patterns:
-        if fnmatch.fnmatch(s, pat):
-            return True
-    return False
+                if include_match is None or not include_match(key):
+                    continue
+                candidates.append((entry, rel))
+    return candidates
 
 def walk_repo(
     root: Path,
@@ -69,62 +260,49 @@ def walk_repo(
     exclude: list[str],
     max_bytes: int,
     follow_symlinks: bool = False,
+    io_threads: int = 16,
+    include_rx: Optional[re.Pattern] = None,
+    exclude_rx: Optional[re.Pattern] = None,
 ) -> list[FileMeta]:
+    """
+    Files under root matching include and not exclude/.gitignore, sorted by path.
+    include_rx/exclude_rx are the compile_globs() matchers for include/exclude when the caller
+    already holds them (see AnalyzeConfig); otherwise they are compiled here.
+    """
     root = root.resolve()
-    spec = _compile_gitignore(root, exclude) if _HAS_PATHSPEC else None
-    results: list[FileMeta] = []
+    candidates = _scan(root, include, exclude, follow_symlinks, include_rx, exclude_rx)
 
-    for dirpath, dirnames, filenames in os.walk(root, followlinks=follow_symlinks):
-        try:
-            dir_rel = Path(dirpath).resolve().relative_to(root)
-        except Exception:
-            dir_rel = Path(dirpath)
-
-        pruned = []
-        for d in list(dirnames):
-            if str(d) in HARD_EXCLUDE_DIRS:
-                pruned.append(d); continue
-            d_rel = (dir_rel / d)
-            d_rel_str = d_rel.as_posix()
-            if spec and spec.match_file(d_rel_str):
-                pruned.append(d); continue
-            if _matches_any(d_rel, exclude):
-                pruned.append(d); continue
-        for d in pruned:
-            dirnames.remove(d)
-
-        for fname in filenames:
-            fpath = Path(dirpath, fname).resolve()
-            try:
-                rel = fpath.relative_to(root)
-            except Exception:
-                rel = fpath
-
-            rel_str = rel.as_posix()
-            if spec and spec.match_file(rel_str):
-                continue
-            if _matches_any(rel, exclude):
-                continue
-            if not _matches_any(rel, include):
-                continue
-
-            try:
-                size = fpath.stat().st_size
-            except FileNotFoundError:
-                continue
-            if size > max_bytes:
-                continue
-
-            try:
-                text = fpath.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-
-            language = detect_language(fpath)
-            results.append(FileMeta(
-                path=rel,
-                bytes=int(size),
-                lines=int(text.count("\n") + 1),
-                language=str(language),
-            ))
+    # Per-file stat + read is what gets overlapped
+    if io_threads > 1 and len(candidates) >= _PARALLEL_MIN_FILES:
+        with ThreadPoolExecutor(max_workers=io_threads) as ex:
+            metas = list(ex.map(lambda c: _file_meta(c[0], c[1], max_bytes), candidates))
+    else:
+        metas = [_file_meta(entry, rel, max_bytes) for entry, rel in candidates]
+    results = [m for m in metas if m is not None]
     return sorted(results, key=lambda fm: str(fm.path))
+
+def newest_mtime(
+    root: Path,
+    include: list[str],
+    exclude: list[str],
+    follow_symlinks: bool = False,
+    include_rx: Optional[re.Pattern] = None,
+    exclude_rx: Optional[re.Pattern] = None,
+) -> int:
+    """
+    Newest st_mtime_ns over the files walk_repo would consider and the directories holding
+    them (a directory's mtime moves when a file is added, removed or renamed). Stats only.
+    """
+    root = root.resolve()
+    dirs: list[os.DirEntry] = []
+    entries = _scan(root, include, exclude, follow_symlinks, include_rx, exclude_rx, dirs)
+    try:
+        newest = os.stat(root).st_mtime_ns
+    except OSError:
+        return 0
+    for entry in dirs + [e for e, _ in entries]:
+        try:
+            newest = max(newest, entry.stat().st_mtime_ns)
+        except OSError:
+            continue
+    return newest
@@ -1,8 +1,14 @@
 from __future__ import annotations
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
+from urllib3.util.retry import Retry
+
+# Concurrent requests in flight for fan-out calls; keeps clear of GitHub's secondary rate limits
+_MAX_IN_FLIGHT = 8
 
 class GitHubPRClient:
     def __init__(self, token: Optional[str] = None, api_base: str = "https://api.github.com"):
@@ -10,18 +16,33 @@ class GitHubPRClient:
         self.token = token or os.getenv("GITHUB_TOKEN") or os.getenv("GH_TOKEN")
         if not self.token:
             raise ValueError("Missing GitHub token (set GITHUB_TOKEN or GH_TOKEN).")
-
-    def _headers(self) -> dict:
-        return {
+        # One pooled session so repeated calls reuse the TCP+TLS connection.
+        # Retry's default allowed_methods leave POSTs out of status retries, so comments aren't
+        # duplicated.
+        self._session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        self._session.mount(
+            "https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        )
+        self._session.headers.update({
             "Accept": "application/vnd.github+json",
             "Authorization": f"Bearer {self.token}",
             "X-GitHub-Api-Version": "2022-11-28",
-        }
+        })
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> "GitHubPRClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def comment_issue(self, owner: str, repo: str, number: int, body: str) -> dict:
         # Works for PRs (they are issues)
         url = f"{self.api_base}/repos/{owner}/{repo}/issues/{number}/comments"
-        r = requests.post(url, headers=self._headers(), json={"body": body}, timeout=60)
+        r = self._session.post(url, json={"body": body}, timeout=60)
         r.raise_for_status()
         return r.json()
 
@@ -35,6 +56,64 @@ class GitHubPRClient:
             "line": int(line),
             "side": side,
         }
-        r = requests.post(url, headers=self._headers(), json=payload, timeout=60)
+        r = self._session.post(url, json=payload, timeout=60)
+        r.raise_for_status()
+        return r.json()
+
+    def create_review(self, owner: str, repo: str, pull_number: int, commit_id: str,
+                      comments: list[dict], body: str = "", event: str = "COMMENT") -> dict:
+        """
+        Post a whole review in one request; each comment is a dict with path, line, body
+        (and optionally side, default RIGHT), as for review_comment_on_pr.
+        """
+        url = f"{self.api_base}/repos/{owner}/{repo}/pulls/{pull_number}/reviews"
+        payload = {
+            "commit_id": commit_id,
+            "body": body,
+            "event": event,
+            "comments": [
+                {
+                    "path": c["path"],
+                    "line": int(c["line"]),
+                    "side": c.get("side", "RIGHT"),
+                    "body": c["body"],
+                }
+                for c in comments
+            ],
+        }
+        r = self._session.post(url, json=payload, timeout=60)
         r.raise_for_status()
         return r.json()
+
+    def _fan_out(self, calls: list, max_workers: int) -> list[dict]:
+        # Independent calls overlap on the pooled session; results keep input order
+        if len(calls) <= 1 or max_workers <= 1:
+            return [call() for call in calls]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as ex:
+            return list(ex.map(lambda call: call(), calls))
+
+    def comment_issues(self, owner: str, repo: str, comments: list[tuple[int, str]],
+                       max_workers: int = _MAX_IN_FLIGHT) -> list[dict]:
+        """comment_issue for each (number, body), with up to `max_workers` requests in flight."""
+        return self._fan_out(
+            [lambda n=n, b=b: self.comment_issue(owner, repo, n, b) for n, b in comments],
+            max_workers,
+        )
+
+    def review_comments_on_pr(self, owner: str, repo: str, pull_number: int, commit_id: str,
+                              comments: list[dict],
+                              max_workers: int = _MAX_IN_FLIGHT) -> list[dict]:
+        """
+        review_comment_on_pr for each comment dict (path, line, body, optional side), concurrently.
+        Prefer create_review when the comments belong to one review.
+        """
+        return self._fan_out(
+            [
+                lambda c=c: self.review_comment_on_pr(
+                    owner, repo, pull_number, c["body"], commit_id, c["path"], c["line"],
+                    c.get("side", "RIGHT"),
+                )
+                for c in comments
+            ],
+            max_workers,
+        )
@@ -3,61 +3,102 @@ import ast
 import re
 from pathlib import Path
 from typing import Literal
+from cqia.analysis.parse_cache import get_tree
 
 Lang = Literal["python", "javascript", "typescript", "unknown"]
 
-_ESM_IMPORT_RE = re.compile(
-    r'^\s*import\s+(?:[\w\{\}\*,\s]+)\s+from\s+[\'"]([^\'"]+)[\'"];?'
-    r'|^\s*import\s+[\'"]([^\'"]+)[\'"];?',
-    re.MULTILINE
+# Written so stdlib re cannot backtrack quadratically across lines: the indent is [ \t]*, not \s*
+# (which rescanned every blank-line run from each of its line starts), and the import clause
+# ends on a non-space so it cannot trade whitespace with the \s+ before "from". With the old
+# pattern, 20k blank lines took ~2 s (no imports) and ~3 s (after a bare "import a").
+_ESM_IMPORT_PATTERN = (
+    r'(?m)^[ \t]*import\s+(?:[\w\{\}\*,\s]*[\w\{\}\*,])\s+from\s+[\'"]([^\'"]+)[\'"];?'
+    r'|^[ \t]*import\s+[\'"]([^\'"]+)[\'"];?'
 )
 
-def _s(x) -> str:
-    return str(x)
+# Unlike _TOKEN_RE in duplication.py, re2 wins here: there are few matches per file, so the
+# per-match binding cost is small. Measured on a 95 KB module with 35 imports: re 0.59 ms,
+# re2 0.43 ms.
+try:
+    import re2  # optional, linear-time DFA scan with the same match API
+    _ESM_IMPORT_RE = re2.compile(_ESM_IMPORT_PATTERN)
+    _HAS_RE2 = True
+except Exception:
+    _ESM_IMPORT_RE = re.compile(_ESM_IMPORT_PATTERN)
+    _HAS_RE2 = False
 
-def _py_imports(text: str) -> set[str]:
+_PATH_SEP_RE = re.compile(r"[\\/]")
+
+# Module-level control flow that imports commonly sit under (platform/optional-dependency guards)
+_GUARD_TYPES = tuple(t for t in (ast.If, ast.Try, getattr(ast, "TryStar", None)) if t is not None)
+
+def _module_level_imports(stmts: list[ast.stmt]):
+    stack = list(reversed(stmts))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, _GUARD_TYPES):
+            inner = list(node.body) + list(node.orelse)
+            for handler in getattr(node, "handlers", ()):
+                inner.extend(handler.body)
+            inner.extend(getattr(node, "finalbody", ()))
+            stack.extend(reversed(inner))
+
+def _py_imports(text: str, path: Path | None = None, nested: bool = False) -> set[str]:
+    """
+    Top-level package names imported at module level, including under if/try guards.
+    Imports inside functions and classes are skipped unless `nested` is set.
+    """
+    # Shared parse: parse_python and the detectors get this same tree for the same text
     try:
-        tree = ast.parse(text or "")
+        tree = get_tree(path or Path("<unknown>"), text or "")
     except Exception:
         return set()
     deps: set[str] = set()
-    for node in ast.walk(tree):
+    nodes = ast.walk(tree) if nested else _module_level_imports(tree.body)
+    for node in nodes:
         if isinstance(node, ast.Import):
             for alias in node.names:
-                base = (alias.name or "").split(".")
-                if base:
-                    deps.add(_s(base))
+                if alias.name:
+                    deps.add(alias.name.split(".", 1)[0])
         elif isinstance(node, ast.ImportFrom):
             mod = node.module or ""
             if node.level and not mod:
                 continue
             if mod:
-                deps.add(_s(mod.split(".")))
+                deps.add(mod.split(".", 1)[0])
     return deps
 
 def _js_imports(text: str) -> set[str]:
     deps: set[str] = set()
-    for m in _ESM_IMPORT_RE.finditer(text or ""):
+    if not text or "import" not in text:
+        return deps
+    for m in _ESM_IMPORT_RE.finditer(text):
         source = (m.group(1) or m.group(2) or "").strip()
         if not source:
             continue
         if source.startswith("."):
-            parts = re.split(r"[\\/]", source)
-            for p in parts:
+            for p in _PATH_SEP_RE.split(source):
                 if p and p not in {".", ".."}:
-                    deps.add(_s(p))
+                    deps.add(p)
                     break
         else:
-            deps.add(_s(source.split("/")))
+            deps.add(source.split("/", 1)[0])
     return deps
 
-def read_imports(path: Path, lang: Lang, root: Path) -> set[str]:
-    try:
-        text = (root / path).read_text(encoding="utf-8", errors="ignore")
-    except Exception:
+def read_imports(
+    path: Path, lang: Lang, root: Path, text: str | None = None, nested: bool = False
+) -> set[str]:
+    if lang not in {"python", "javascript", "typescript"}:
         return set()
+    if text is None:
+        try:
+            text = (root / path).read_text(encoding="utf-8", errors="ignore")
+        except Exception:
+            return set()
     if lang == "python":
-        return _py_imports(text)
+        return _py_imports(text, path, nested)
     elif lang in {"javascript", "typescript"}:
         return _js_imports(text)
     return set()
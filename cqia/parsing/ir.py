@@ -26,3 +26,6 @@ class ModuleIR:
     path: Path
     lang: Lang
     functions: list[FunctionIR]
+    # source, when already read
+    text: Optional[str] = field(default=None, repr=False, compare=False)
+    degraded: bool = field(default=False, repr=False, compare=False)  # parser unavailable or failed
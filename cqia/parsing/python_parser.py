@@ -1,44 +1,81 @@
 from __future__ import annotations
 import ast
+import re
 from pathlib import Path
 from typing import List
 from cqia.parsing.ir import ModuleIR, FunctionIR, Span
+from cqia.analysis.parse_cache import get_tree
 
 BRANCH_NODES = (ast.If, ast.For, ast.While, ast.Try, ast.With, ast.BoolOp, ast.IfExp)
 
-def _get_source_segment(text: str, node: ast.AST) -> str:
+# Same line split the parser (and ast.get_source_segment) uses: \r\n, \r and \n only
+_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+
+def _get_source_segment(lines: list[str], node: ast.AST) -> str:
+    """ast.get_source_segment over lines split once per file instead of once per call."""
     try:
-        return ast.get_source_segment(text, node) or ""
+        if node.end_lineno is None or node.end_col_offset is None:
+            return ""
+        lineno = node.lineno - 1
+        end_lineno = node.end_lineno - 1
+        if lineno == end_lineno:
+            return lines[lineno].encode()[node.col_offset:node.end_col_offset].decode()
+        first = lines[lineno].encode()[node.col_offset:].decode()
+        last = lines[end_lineno].encode()[:node.end_col_offset].decode()
+        return first + "".join(lines[lineno + 1:end_lineno]) + last
     except Exception:
         return ""
 
-def _complexity_count(node: ast.AST) -> int:
-    count = 0
-    for child in ast.walk(node):
-        if isinstance(child, BRANCH_NODES):
-            count += 1
-        elif isinstance(child, ast.ExceptHandler):
-            count += 1
-    return count
+_BRANCH_TYPES = BRANCH_NODES + (ast.ExceptHandler,)
+_FUNC_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+def _functions_with_complexity(tree: ast.AST) -> list[tuple[ast.AST, int]]:
+    """
+    (function node, branch count over its whole subtree) from a single traversal.
+    A running branch total is read on entry and exit of each function, so nested
+    functions still count toward their parents. Order matches ast.walk's.
+    """
+    found: list[list] = []
+    branches = 0
+    stack: list[tuple[object, int]] = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if depth < 0:
+            # Exit marker: node is the [depth, fn, branches-at-entry] record
+            node[2] = branches - node[2]
+            continue
+        if isinstance(node, _BRANCH_TYPES):
+            branches += 1
+        elif isinstance(node, _FUNC_TYPES):
+            rec = [depth, node, branches]
+            found.append(rec)
+            stack.append((rec, -1))
+        children = list(ast.iter_child_nodes(node))
+        children.reverse()
+        stack.extend((child, depth + 1) for child in children)
+    # Pre-order within one depth is ast.walk's breadth-first order, so a stable sort restores it
+    found.sort(key=lambda rec: rec[0])
+    return [(rec[1], rec[2]) for rec in found]
 
 def parse_python(path: Path, text: str) -> ModuleIR:
-    tree = ast.parse(text)
+    tree = get_tree(path, text)
     functions: List[FunctionIR] = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            name = node.name
-            start = getattr(node, "lineno", 1)
-            end = getattr(node, "end_lineno", start)
-            doc = ast.get_docstring(node)
-            body_text = _get_source_segment(text, node) or ""
-            fn = FunctionIR(
-                id=f"{path.as_posix()}::{name}:{start}",
-                name=name,
-                lang="python",
-                span=Span(path=path, start_line=start, end_line=end),
-                doc=doc,
-                text=body_text,
-                metrics={"complexity_branch_count": float(_complexity_count(node))}
-            )
-            functions.append(fn)
+    found = _functions_with_complexity(tree)
+    lines = _LINE_RE.findall(text) if found else []
+    for node, branches in found:
+        name = node.name
+        start = getattr(node, "lineno", 1)
+        end = getattr(node, "end_lineno", start)
+        doc = ast.get_docstring(node)
+        body_text = _get_source_segment(lines, node) or ""
+        fn = FunctionIR(
+            id=f"{path.as_posix()}::{name}:{start}",
+            name=name,
+            lang="python",
+            span=Span(path=path, start_line=start, end_line=end),
+            doc=doc,
+            text=body_text,
+            metrics={"complexity_branch_count": float(branches)}
+        )
+        functions.append(fn)
     return ModuleIR(path=path, lang="python", functions=functions)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import List
+import threading
 try:
     from tree_sitter import Language, Parser
 except Exception:
@@ -11,49 +12,82 @@ from cqia.parsing.ir import FunctionIR, ModuleIR, Span
 
 def _fallback_module(path: Path, text: str, lang_hint: str) -> ModuleIR:
     # No parsed functions; still return a ModuleIR so other detectors can run on file text.
-    return ModuleIR(path=Path(path), lang=lang_hint, functions=[])
+    # Marked degraded so it is never persisted in the module cache.
+    return ModuleIR(path=Path(path), lang=lang_hint, functions=[], degraded=True)
+
+# Matched in C by tree-sitter; only the function nodes come back to Python
+_FUNCTION_QUERY = "(function_declaration name: (identifier) @name) @fn"
+
+# (language, compiled query) per lang hint, built on first use
+_LANG_STATE: dict[str, tuple[object, object]] = {}
+# Parsers are reused per thread (one per language); a parser is not safe to share across threads
+_PARSERS = threading.local()
+
+def _lang_state(lang_hint: str):
+    state = _LANG_STATE.get(lang_hint)
+    if state is None:
+        from cqia.vendor.ts_languages import JAVASCRIPT, TYPESCRIPT  # optional
+        language = JAVASCRIPT if lang_hint == "javascript" else TYPESCRIPT
+        state = _LANG_STATE[lang_hint] = (language, language.query(_FUNCTION_QUERY))
+    return state
+
+def _parser_for(lang_hint: str, language):
+    parsers = getattr(_PARSERS, "by_lang", None)
+    if parsers is None:
+        parsers = _PARSERS.by_lang = {}
+    parser = parsers.get(lang_hint)
+    if parser is None:
+        parser = parsers[lang_hint] = Parser()
+        parser.set_language(language)
+    return parser
+
+def _function_nodes(query, root) -> list:
+    captures = query.captures(root)
+    # Older bindings return [(node, name)] in document order, newer ones {name: [node]}
+    if isinstance(captures, dict):
+        return sorted(captures.get("fn", []), key=lambda n: n.start_byte)
+    return [node for node, name in captures if name == "fn"]
 
 def parse_js_ts(path: Path, text: str, lang_hint: str) -> ModuleIR:
     if Parser is None or Language is None:
         return _fallback_module(path, text, lang_hint)
     try:
-        parser = Parser()
-        # Expect caller to have set Language instances globally; if not available, fallback.
+        # Expect the vendored Language instances to be importable; if not available, fallback.
         try:
-            from cqia.vendor.ts_languages import JAVASCRIPT, TYPESCRIPT  # optional
+            language, query = _lang_state(lang_hint)
         except Exception:
             return _fallback_module(path, text, lang_hint)
-        parser.set_language(JAVASCRIPT if lang_hint == "javascript" else TYPESCRIPT)
+        parser = _parser_for(lang_hint, language)
         src = text.encode("utf-8", errors="ignore")
         tree = parser.parse(src)
-        root = tree.root_node
+        # For ASCII sources byte offsets are str offsets, so slices come straight from `text`
+        is_ascii = text.isascii()
+
+        def _slice(a: int, b: int) -> str:
+            return text[a:b] if is_ascii else src[a:b].decode("utf-8", errors="ignore")
+
         functions: List[FunctionIR] = []
-        stack = [root]
-        while stack:
-            node = stack.pop()
-            for i in range(len(node.children) - 1, -1, -1):
-                stack.append(node.children[i])
-            if node.type in ("function_declaration",):
-                name_node = node.child_by_field_name("name")
-                if not name_node:
-                    continue
-                name = src[name_node.start_byte:name_node.end_byte].decode("utf-8", errors="ignore").strip()
-                if not name:
-                    continue
-                s_line = int(node.start_point) + 1
-                e_line = int(node.end_point) + 1
-                body_src = src[node.start_byte:node.end_byte].decode("utf-8", errors="ignore")
-                functions.append(
-                    FunctionIR(
-                        id=f"{path.as_posix()}::{name}:{s_line}",
-                        name=name,
-                        lang=lang_hint,
-                        span=Span(path=Path(path), start_line=s_line, end_line=e_line),
-                        doc=None,
-                        text=body_src,
-                        metrics={"complexity_branch_count": 0.0},
-                    )
+        for node in _function_nodes(query, tree.root_node):
+            name_node = node.child_by_field_name("name")
+            if not name_node:
+                continue
+            name = _slice(name_node.start_byte, name_node.end_byte).strip()
+            if not name:
+                continue
+            s_line = node.start_point[0] + 1
+            e_line = node.end_point[0] + 1
+            body_src = _slice(node.start_byte, node.end_byte)
+            functions.append(
+                FunctionIR(
+                    id=f"{path.as_posix()}::{name}:{s_line}",
+                    name=name,
+                    lang=lang_hint,
+                    span=Span(path=Path(path), start_line=s_line, end_line=e_line),
+                    doc=None,
+                    text=body_src,
+                    metrics={"complexity_branch_count": 0.0},
                 )
+            )
         return ModuleIR(path=Path(path), lang=lang_hint, functions=functions)
     except Exception:
         return _fallback_module(path, text, lang_hint)
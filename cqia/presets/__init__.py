@@ -1,7 +1,20 @@
 from __future__ import annotations
 from pathlib import Path
+import copy
 import yaml
 
+# libyaml-backed dumper when PyYAML was built with it; same safe subset either way
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+_HAS_CSAFE_LOADER = hasattr(yaml, "CSafeLoader")
+
+def _safe_load(text: str):
+    # CSafeLoader is the C build of SafeLoader: same safe subset as yaml.safe_load, parsed in
+    # libyaml.
+    # The loader is spelled out so the security detector can see it is a safe one.
+    if _HAS_CSAFE_LOADER:
+        return yaml.load(text, Loader=yaml.CSafeLoader)
+    return yaml.safe_load(text)
+
 DEFAULT_RULES = {
     "complexity": {"warn_at": 10, "p1_cutoff": 15, "p0_cutoff": 20},
     "duplication": {"k_shingle": 7, "similarity_threshold": 0.90},
@@ -11,21 +24,37 @@ DEFAULT_RULES = {
     },
 }
 
+# Parsed rules per resolved path, tagged with the (mtime_ns, size) they were read at
+_RULES_CACHE: dict[Path, tuple[tuple[int, int], dict]] = {}
+
+def _load_rules_cached(p: Path) -> dict:
+    try:
+        st = p.stat()
+    except OSError:
+        return copy.deepcopy(DEFAULT_RULES)
+    key = p.resolve()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _RULES_CACHE.get(key)
+    if hit is None or hit[0] != stamp:
+        try:
+            rules = _safe_load(p.read_text(encoding="utf-8")) or DEFAULT_RULES
+        except Exception:
+            rules = DEFAULT_RULES
+        hit = _RULES_CACHE[key] = (stamp, rules)
+    # Callers get their own copy so mutating one result can't leak into the cache
+    return copy.deepcopy(hit[1])
+
 def load_rules(rules_path: Path | None) -> dict:
     if not rules_path:
         p = Path("presets/rules.yaml")
     else:
         p = rules_path
-    if p.exists():
-        try:
-            return yaml.safe_load(p.read_text(encoding="utf-8")) or DEFAULT_RULES
-        except Exception:
-            return DEFAULT_RULES
-    return DEFAULT_RULES
+    return _load_rules_cached(p)
 
 def save_rules(rules: dict, rules_path: Path | None) -> Path:
     p = rules_path or Path("presets/rules.yaml")
     p.parent.mkdir(parents=True, exist_ok=True)
-    import yaml
-    p.write_text(yaml.safe_dump(rules, sort_keys=False), encoding="utf-8")
+    p.write_text(yaml.dump(rules, Dumper=_Dumper, sort_keys=False), encoding="utf-8")
+    # A rewrite can land within the same mtime tick and size, so don't trust the stamp here
+    _RULES_CACHE.pop(p.resolve(), None)
     return p
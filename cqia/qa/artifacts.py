@@ -1,6 +1,43 @@
 from __future__ import annotations
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
+import json
+import os
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+def _scan_reports(rep_dir: Path) -> Tuple[Optional[Path], Optional[Path], Optional[Path]]:
+    """(report.md, report.json, most recent *.json) in one directory read; no dir yields Nones."""
+    md = js = newest = None
+    newest_mtime = 0.0
+    try:
+        it = os.scandir(rep_dir)
+    except OSError:
+        return None, None, None
+    with it:
+        for entry in it:
+            name = entry.name
+            if not name.endswith((".md", ".json")):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                if name == "report.md":
+                    md = Path(entry.path)
+                elif name.endswith(".json"):
+                    if name == "report.json":
+                        js = Path(entry.path)
+                    mtime = entry.stat().st_mtime
+                    if newest is None or mtime > newest_mtime:
+                        newest, newest_mtime = Path(entry.path), mtime
+            except OSError:
+                continue
+    return md, js, newest
 
 def find_artifacts(scope: Path) -> Tuple[Optional[Path], Optional[Path]]:
     """
@@ -9,26 +46,55 @@ def find_artifacts(scope: Path) -> Tuple[Optional[Path], Optional[Path]]:
     - report.json (or the most recent *.json) exported by exporters
     """
     scope = scope.resolve()
-    candidates_md = [
-        scope / "reports" / "report.md",
-        scope / "report.md",
-    ]
-    candidates_json = [
-        scope / "reports" / "report.json",
-        scope / "report.json",
-    ]
+    report_md, report_json, newest_json = _scan_reports(scope / "reports")
+    # Scope-level candidates are only checked when reports/ didn't have them
+    if report_md is None and os.path.isfile(scope / "report.md"):
+        report_md = scope / "report.md"
+    if report_json is None:
+        if os.path.isfile(scope / "report.json"):
+            report_json = scope / "report.json"
+        else:
+            report_json = newest_json
+    return report_md, report_json
 
-    report_md = next((p for p in candidates_md if p.exists()), None)
+_MAX_JSON_ENTRIES = 8
+# Parsed report + its text per resolved path, tagged with the (mtime_ns, size) they were read at
+_JSON_CACHE: "OrderedDict[Path, tuple[tuple[int, int], Any, str]]" = OrderedDict()
 
-    report_json = next((p for p in candidates_json if p.exists()), None)
-    if not report_json:
-        # pick most recent *.json in reports if available
-        rep_dir = scope / "reports"
-        if rep_dir.exists():
-            jsons = sorted(rep_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-            report_json = jsons if jsons else None
+def load_artifacts_json(report_json: Path) -> Tuple[Any, str]:
+    """
+    Parse a JSON artifact once per file version and return (data, file text as written).
+    The parsed object is shared between callers and must be treated as read-only.
+    Raises OSError/ValueError when the file is missing or not valid JSON.
+    """
+    st = report_json.stat()
+    key = report_json.resolve()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _JSON_CACHE.get(key)
+    if hit is not None and hit[0] == stamp:
+        _JSON_CACHE.move_to_end(key)
+        return hit[1], hit[2]
+    raw = report_json.read_bytes()
+    data = orjson.loads(raw) if _HAS_ORJSON else json.loads(raw)
+    # The file's own text, not a re-serialization: identical with or without orjson
+    text = raw.decode("utf-8", errors="ignore")
+    _JSON_CACHE[key] = (stamp, data, text)
+    if len(_JSON_CACHE) > _MAX_JSON_ENTRIES:
+        _JSON_CACHE.popitem(last=False)
+    return data, text
 
-    return report_md, report_json
+def _read_trimmed(path: Path, max_chars: int) -> str:
+    """Head and tail of a file in O(max_chars) memory; the middle is never read."""
+    half = max_chars // 2
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size <= max_chars:
+            return f.read().decode("utf-8", errors="ignore")
+        head = f.read(half)
+        f.seek(-half, 2)
+        tail = f.read(half)
+    return f"{head.decode('utf-8', errors='ignore')}\n...\n{tail.decode('utf-8', errors='ignore')}"
 
 def load_artifacts_text(report_md: Optional[Path], report_json: Optional[Path], max_chars: int = 80_000) -> str:
     """
@@ -38,22 +104,14 @@ def load_artifacts_text(report_md: Optional[Path], report_json: Optional[Path],
     parts: list[str] = []
     if report_md and report_md.exists():
         try:
-            text = report_md.read_text(encoding="utf-8", errors="ignore")
-            if len(text) > max_chars:
-                head = text[: max_chars // 2]
-                tail = text[-max_chars // 2 :]
-                text = f"{head}\n...\n{tail}"
-            parts.append(f"# report.md\n{text}")
+            parts.append(f"# report.md\n{_read_trimmed(report_md, max_chars)}")
         except Exception:
             pass
 
     if report_json and report_json.exists():
         try:
-            jtxt = report_json.read_text(encoding="utf-8", errors="ignore")
-            if len(jtxt) > max_chars:
-                head = jtxt[: max_chars // 2]
-                tail = jtxt[-max_chars // 2 :]
-                jtxt = f"{head}\n...\n{tail}"
+            # Passed through as written; nothing is parsed, and big reports are only head/tail-read
+            jtxt = _read_trimmed(report_json, max_chars)
             parts.append(f"# report.json\n{jtxt}")
         except Exception:
             pass
@@ -3,11 +3,65 @@ AST-based chunker for extracting functions, classes, methods, and docstrings fro
 """
 from __future__ import annotations
 import ast
+import re
 from pathlib import Path
 from typing import List, Optional, Union
 from dataclasses import dataclass
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from cqia.analysis.parse_cache import get_tree
+from cqia.rag.retrieval.smart_retriever import name_tokens
+
+# The four JS function-start forms as one ordered alternation; the first alternative that
+# matches wins, exactly as trying the patterns one by one did
+_JS_FUNC_RE = re.compile(
+    r"^\s*(?:"
+    r"function\s+(?P<a>[\w$]+)\s*\("
+    r"|const\s+(?P<b>[\w$]+)\s*=\s*(?:async\s+)?\([^)]*\)\s*=>"
+    r"|(?P<c>[\w$]+)\s*:\s*(?:async\s+)?function"
+    r"|(?:export\s+)?(?:async\s+)?function\s+(?P<d>[\w$]+)"
+    r")"
+)
+
+_FUNC_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+_BRANCH_TYPES = frozenset({ast.If, ast.While, ast.For, ast.AsyncFor, ast.IfExp, ast.ExceptHandler})
+_iter_children = ast.iter_child_nodes
+
+def _complexity_map(root: ast.AST) -> dict[ast.AST, float]:
+    """
+    Complexity of every function under `root` from one traversal: a running branch total is
+    read on entry and exit of each function, so nested code counts toward every enclosing one.
+    """
+    out: dict[ast.AST, float] = {}
+    total = 0
+    stack: list = [root]
+    while stack:
+        node = stack.pop()
+        t = type(node)
+        if t is tuple:
+            # Exit marker (function, total at entry), pushed below the function's children
+            fn, entry = node
+            out[fn] = float(1 + total - entry)
+            continue
+        if t in _BRANCH_TYPES:
+            total += 1
+        elif t is ast.BoolOp:
+            total += max(0, len(node.values) - 1)
+        elif t in _FUNC_TYPES:
+            stack.append((node, total))
+        stack.extend(_iter_children(node))
+    return out
+
+def _nested_statements(node: ast.AST) -> List[ast.stmt]:
+    """Statements under a compound statement other than a def: if/for/while/with/try/match."""
+    out: List[ast.stmt] = []
+    for name in ("body", "orelse", "finalbody"):
+        out.extend(getattr(node, name, None) or ())
+    for handler in getattr(node, "handlers", None) or ():
+        out.extend(handler.body)
+    for case in getattr(node, "cases", None) or ():
+        out.extend(case.body)
+    return out
 
 @dataclass
 class CodeChunk:
@@ -42,7 +96,8 @@ class ASTFunctionChunker:
     def _extract_python_chunks(self, file_path: str, content: str) -> List[CodeChunk]:
         chunks: List[CodeChunk] = []
         try:
-            tree = ast.parse(content)
+            # Content-keyed shared parse, so re-chunking an unchanged file is a cache hit
+            tree = get_tree(Path(file_path), content)
             lines = content.splitlines()
 
             # Module docstring
@@ -59,20 +114,30 @@ class ASTFunctionChunker:
                     docstring=module_docstring
                 ))
 
-            for node in ast.walk(tree):
+            complexity = _complexity_map(tree)
+
+            # Statement-level walk in source order: into if/try/with/loop bodies and function
+            # bodies, so guarded and nested defs are chunked too. Defs directly in a class body
+            # (or in a guard inside it) are chunked once, as methods.
+            stack: List[tuple] = [(node, None) for node in reversed(tree.body)]
+            while stack:
+                node, parent_class = stack.pop()
                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    fn_chunk = self._extract_function_chunk(node, lines, file_path)
+                    fn_chunk = self._extract_function_chunk(
+                        node, lines, file_path,
+                        parent_class=parent_class, complexity=complexity.get(node),
+                    )
                     if fn_chunk:
                         chunks.append(fn_chunk)
+                    stack.extend((item, None) for item in reversed(node.body))
                 elif isinstance(node, ast.ClassDef):
                     cl_chunk = self._extract_class_chunk(node, lines, file_path)
                     if cl_chunk:
                         chunks.append(cl_chunk)
-                    for item in node.body:
-                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                            m_chunk = self._extract_function_chunk(item, lines, file_path, parent_class=node.name)
-                            if m_chunk:
-                                chunks.append(m_chunk)
+                    stack.extend((item, node.name) for item in reversed(node.body))
+                else:
+                    inner = _nested_statements(node)
+                    stack.extend((item, parent_class) for item in reversed(inner))
         except SyntaxError:
             return self._extract_generic_chunks(file_path, content, "python")
         return chunks
@@ -82,7 +147,8 @@ class ASTFunctionChunker:
         node: Union[ast.FunctionDef, ast.AsyncFunctionDef],
         lines: List[str],
         file_path: str,
-        parent_class: Optional[str] = None
+        parent_class: Optional[str] = None,
+        complexity: Optional[float] = None,
     ) -> Optional[CodeChunk]:
         try:
             start_line = int(getattr(node, "lineno", 1))
@@ -90,7 +156,8 @@ class ASTFunctionChunker:
             end_line = min(end_line, len(lines))
             body = "\n".join(lines[start_line - 1:end_line])
             docstring = ast.get_docstring(node)
-            complexity = self._complexity(node)
+            if complexity is None:
+                complexity = self._complexity(node)
             ctype = "method" if parent_class else "function"
             name = f"{parent_class}.{node.name}" if parent_class else node.name
             return CodeChunk(
@@ -134,35 +201,27 @@ class ASTFunctionChunker:
             return None
 
     def _extract_js_chunks(self, file_path: str, content: str, language: str) -> List[CodeChunk]:
-        import re
         chunks: List[CodeChunk] = []
         lines = content.splitlines()
-        patterns = [
-            r'^\s*function\s+([\w$]+)\s*\(',
-            r'^\s*const\s+([\w$]+)\s*=\s*(?:async\s+)?\([^)]*\)\s*=>',
-            r'^\s*([\w$]+)\s*:\s*(?:async\s+)?function',
-            r'^\s*(?:export\s+)?(?:async\s+)?function\s+([\w$]+)',
-        ]
+        match = _JS_FUNC_RE.match
         for i, line in enumerate(lines):
-            for pat in patterns:
-                m = re.match(pat, line)
-                if m:
-                    name = m.group(1)
-                    start_line = i + 1
-                    end_line = self._find_js_end(lines, i)
-                    text = "\n".join(lines[i:end_line])
-                    docstring = self._extract_jsdoc(lines, i)
-                    chunks.append(CodeChunk(
-                        content=text,
-                        chunk_type="function",
-                        file_path=file_path,
-                        start_line=start_line,
-                        end_line=end_line,
-                        name=name,
-                        language=language,
-                        docstring=docstring
-                    ))
-                    break
+            m = match(line)
+            if m:
+                name = m.group("a") or m.group("b") or m.group("c") or m.group("d")
+                start_line = i + 1
+                end_line = self._find_js_end(lines, i)
+                text = "\n".join(lines[i:end_line])
+                docstring = self._extract_jsdoc(lines, i)
+                chunks.append(CodeChunk(
+                    content=text,
+                    chunk_type="function",
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=name,
+                    language=language,
+                    docstring=docstring
+                ))
         if not chunks:
             chunks.extend(self._extract_generic_chunks(file_path, content, language))
         return chunks
@@ -217,15 +276,7 @@ class ASTFunctionChunker:
         return out
 
     def _complexity(self, node: ast.AST) -> float:
-        count = 1
-        for ch in ast.walk(node):
-            if isinstance(ch, (ast.If, ast.While, ast.For, ast.AsyncFor, ast.IfExp)):
-                count += 1
-            elif isinstance(ch, ast.BoolOp):
-                count += max(0, len(getattr(ch, "values", [])) - 1)
-            elif isinstance(ch, ast.ExceptHandler):
-                count += 1
-        return float(count)
+        return _complexity_map(node)[node]
 
     def chunks_to_documents(self, chunks: List[CodeChunk]) -> List[Document]:
         docs: List[Document] = []
@@ -239,6 +290,9 @@ class ASTFunctionChunker:
                 "language": c.language,
                 "file_name": Path(c.file_path).name,
                 "file_stem": Path(c.file_path).stem,
+                # Pre-split once here so the retriever's name boost doesn't re-tokenize per query
+                "_name_tokens": name_tokens(c.name),
+                "_file_tokens": name_tokens(Path(c.file_path).name),
             }
             if c.parent_name:
                 md["parent_name"] = c.parent_name
@@ -2,7 +2,13 @@
 ChromaDB vector store manager for code embeddings and retrieval.
 """
 from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+import hashlib
+import json
+import os
 from typing import List, Dict, Any, Optional, Tuple
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -39,17 +45,21 @@ class CodeVectorStore:
             persist_directory=str(self.persist_directory),
         )
 
-    def add_documents(self, documents: List[Document], batch_size: int = 100) -> List[str]:
+    def add_documents(
+        self, documents: List[Document], batch_size: int = 100, ids: Optional[List[str]] = None
+    ) -> List[str]:
+        if ids is None:
+            # Ids are unique per file, so adding one file's chunks never overwrites another file's
+            ids = [f"{d.metadata.get('file_path', 'doc')}::{j}" for j, d in enumerate(documents)]
         all_ids = []
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
-            batch_ids = [f"doc_{i + j}" for j in range(len(batch))]
+            batch_ids = ids[i:i + batch_size]
             self.vector_store.add_documents(documents=batch, ids=batch_ids)
             all_ids.extend(batch_ids)
         # No explicit persist() needed with Chroma 0.4+
         return all_ids
 
-
     def delete_by_file_path(self, file_path: str) -> int:
         try:
             col = self.client.get_collection(self.collection_name)
@@ -85,6 +95,32 @@ class CodeVectorStore:
     ) -> List[Tuple[Document, float]]:
         return self.vector_store.similarity_search_with_score(query=query, k=k, filter=filter)
 
+    def batch_similarity_search_with_score(
+        self, queries: List[str], k: int = 5, filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        One Chroma query for all queries; results are per query. Each query is embedded with
+        embed_query, exactly as similarity_search_with_score does (query and document embeddings
+        differ for asymmetric models), so batch and single retrieval agree.
+        """
+        if not queries:
+            return []
+        embs = [self.embeddings.embed_query(q) for q in queries]
+        col = self.client.get_collection(self.collection_name)
+        res = col.query(
+            query_embeddings=embs,
+            n_results=k,
+            where=filter,
+            include=["documents", "metadatas", "distances"],
+        )
+        out: List[List[Tuple[Document, float]]] = []
+        for texts, metas, dists in zip(res["documents"], res["metadatas"], res["distances"]):
+            out.append([
+                (Document(page_content=t or "", metadata=md or {}), float(dist))
+                for t, md, dist in zip(texts, metas, dists)
+            ])
+        return out
+
     def get_collection_stats(self) -> Dict[str, Any]:
         try:
             col = self.client.get_collection(self.collection_name)
@@ -122,26 +158,140 @@ class CodeVectorStore:
         except Exception:
             return False
 
+# Files read and chunked ahead of the embedding/write loop in index_repository
+_PREPARE_WINDOW = 32
+# Chunks per embedding call; documents from several files are pooled up to this size
+_EMBED_BATCH = 256
+
+# Per-file (mtime_ns, size, content digest) of what is in the index, kept next to the Chroma data
+_MANIFEST_NAME = "manifest.json"
+
 class CodeEmbeddingManager:
     def __init__(self, persist_directory: str = ".cqia_vectordb", embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
         self.vector_store = CodeVectorStore(persist_directory=persist_directory, embedding_model=embedding_model)
+        self._manifest_path = Path(persist_directory) / _MANIFEST_NAME
+        self._manifest: Dict[str, Tuple[int, int, str]] = self._load_manifest()
+        # Chunks waiting for one pooled embedding pass, and the files (with manifest entries)
+        # they belong to
+        self._pending: List[Document] = []
+        self._pending_ids: List[str] = []
+        self._pending_files: List[Tuple[str, Tuple[int, int, str]]] = []
+
+    def _load_manifest(self) -> Dict[str, Tuple[int, int, str]]:
+        try:
+            raw = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            return {k: (int(v[0]), int(v[1]), str(v[2])) for k, v in raw.items()}
+        except Exception:
+            return {}
+
+    def _save_manifest(self) -> None:
+        try:
+            self._manifest_path.write_text(json.dumps(self._manifest), encoding="utf-8")
+        except Exception:
+            pass
+
+    def flush(self) -> None:
+        """
+        Embed and store all pending chunks in _EMBED_BATCH-sized calls, then record their files
+        in the manifest. On failure nothing is recorded, so those files are redone next run.
+        """
+        docs, ids, files = self._pending, self._pending_ids, self._pending_files
+        self._pending, self._pending_ids, self._pending_files = [], [], []
+        if docs:
+            self.vector_store.add_documents(docs, batch_size=_EMBED_BATCH, ids=ids)
+        for key, entry in files:
+            self._manifest[key] = entry
+
+    def reset_collection(self) -> bool:
+        """Drop the vector collection and the manifest, so the next index embeds everything."""
+        ok = self.vector_store.reset_collection()
+        self._manifest = {}
+        self._save_manifest()
+        return ok
 
-    def index_repository(self, file_metas: List, chunker_func: callable) -> Dict[str, Any]:
-        results = {"total_files": 0, "successful_files": 0, "failed_files": 0, "total_chunks": 0, "errors": []}
-        for fm in file_metas:
-            try:
-                text = Path(fm.path).read_text(encoding="utf-8", errors="ignore")
-                docs = chunker_func(str(fm.path), text, fm.language)
-                if docs:
-                    ids = self.vector_store.update_documents(docs, str(fm.path))
-                    results["total_chunks"] += len(ids)
-                    results["successful_files"] += 1
-                results["total_files"] += 1
-            except Exception as e:
-                results["failed_files"] += 1
-                results["errors"].append(f"{fm.path}: {e}")
+    def _prepare_file(
+        self, fm, chunker_func: callable
+    ) -> Tuple[str, str, Tuple[int, int], str, Optional[List[Document]]]:
+        """
+        Stat, read, hash and chunk one file; returns (kind, key, stamp, digest, docs), with kind
+        one of skip/touched/chunked.
+        """
+        key = str(fm.path)
+        st = os.stat(fm.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        prev = self._manifest.get(key)
+        # Unchanged since the last index: no read, chunk or embedding
+        if prev is not None and prev[:2] == stamp:
+            return "skip", key, stamp, prev[2], None
+        text = Path(fm.path).read_text(encoding="utf-8", errors="ignore")
+        digest = hashlib.blake2b(text.encode("utf-8", errors="ignore"), digest_size=16).hexdigest()
+        if prev is not None and prev[2] == digest:
+            # Touched but identical content
+            return "touched", key, stamp, digest, None
+        docs = chunker_func(key, text, fm.language)
+        if docs:
+            # Resolved, slash-normalized path stored once so query-time scoping is a string compare
+            norm = Path(fm.path).resolve().as_posix()
+            for d in docs:
+                d.metadata["file_path_norm"] = norm
+        return "chunked", key, stamp, digest, docs
+
+    def index_repository(
+        self, file_metas: List, chunker_func: callable, max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        results = {
+            "total_files": 0, "successful_files": 0, "skipped_files": 0,
+            "failed_files": 0, "total_chunks": 0, "errors": [],
+        }
+        # Reading and chunking run on a pool; results are consumed in input order by this thread,
+        # which does all vector-store writes. At most _PREPARE_WINDOW files are prepared ahead.
+        pending: deque = deque()
+        metas = iter(file_metas)
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+            for fm in islice(metas, _PREPARE_WINDOW):
+                pending.append((fm, ex.submit(self._prepare_file, fm, chunker_func)))
+            while pending:
+                fm, fut = pending.popleft()
+                nxt = next(metas, None)
+                if nxt is not None:
+                    pending.append((nxt, ex.submit(self._prepare_file, nxt, chunker_func)))
+                try:
+                    kind, key, stamp, digest, docs = fut.result()
+                    if kind != "chunked":
+                        results["skipped_files"] += 1
+                        self._manifest[key] = (*stamp, digest)
+                    elif docs:
+                        # Old chunks go now; the new ones are embedded with other files' in the
+                        # next flush
+                        self.vector_store.delete_by_file_path(key)
+                        self._pending.extend(docs)
+                        self._pending_ids.extend(f"{key}::{j}" for j in range(len(docs)))
+                        self._pending_files.append((key, (*stamp, digest)))
+                        results["total_chunks"] += len(docs)
+                        results["successful_files"] += 1
+                    else:
+                        self._manifest[key] = (*stamp, digest)
+                    results["total_files"] += 1
+                except Exception as e:
+                    results["failed_files"] += 1
+                    results["errors"].append(f"{fm.path}: {e}")
+                if len(self._pending) >= _EMBED_BATCH:
+                    self._flush_into(results)
+        self._flush_into(results)
+        self._save_manifest()
         return results
 
+    def _flush_into(self, results: Dict[str, Any]) -> None:
+        files = [key for key, _ in self._pending_files]
+        n_docs = len(self._pending)
+        try:
+            self.flush()
+        except Exception as e:
+            results["successful_files"] -= len(files)
+            results["failed_files"] += len(files)
+            results["total_chunks"] -= n_docs
+            results["errors"].append(f"embedding batch for {len(files)} files: {e}")
+
     def get_stats(self) -> Dict[str, Any]:
         return self.vector_store.get_collection_stats()
 
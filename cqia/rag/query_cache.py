@@ -0,0 +1,64 @@
+"""
+Content-addressed cache for retrieval results, keyed on the question and retrieval settings.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import json
+import time
+
+try:
+    from blake3 import blake3 as _hasher
+except Exception:
+    _hasher = hashlib.blake2b
+
+try:
+    import diskcache
+    _HAS_DISKCACHE = True
+except Exception:
+    _HAS_DISKCACHE = False
+
+class QueryCache:
+    def __init__(self, directory: str = ".cqia_cache/queries", ttl_s: Optional[float] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self._cache = diskcache.Cache(str(self.directory)) if _HAS_DISKCACHE else None
+
+    @staticmethod
+    def make_key(question: str, model: str, k: int, boost: float, index_version: str = "") -> str:
+        raw = f"{model}|{k}|{boost}|{index_version}|{question}".encode("utf-8")
+        return _hasher(raw).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if self._cache is not None:
+            return self._cache.get(key)
+        p = self.directory / f"{key}.json"
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        if self.ttl_s is not None and time.time() - float(entry.get("ts", 0)) > self.ttl_s:
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: List[Dict[str, Any]]) -> None:
+        if self._cache is not None:
+            self._cache.set(key, value, expire=self.ttl_s)
+            return
+        p = self.directory / f"{key}.json"
+        try:
+            p.write_text(json.dumps({"ts": time.time(), "value": value}), encoding="utf-8")
+        except Exception:
+            pass
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        value = compute()
+        self.set(key, value)
+        return value
@@ -43,6 +43,22 @@ from langchain_core.callbacks.manager import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
 import re
 
+_IDENT_RE = re.compile(r"\b[a-zA-Z_][a-zA-Z0-9_]*\b")
+# Word parts of one identifier: HTTPServer -> HTTP, Server; parse2json -> parse, 2, json
+_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def name_tokens(text: str) -> str:
+    """
+    Space-joined match tokens for a chunk or file name: each identifier plus its parts split at
+    '_', camelCase and digit boundaries, so `parse` hits `parse_python` and `vector` hits
+    `CodeVectorStore`. Stored as a string because Chroma metadata values must be scalars.
+    """
+    out: dict[str, None] = {}
+    for ident in _IDENT_RE.findall(text or ""):
+        out[ident.lower()] = None
+        out.update(dict.fromkeys(p.lower() for p in _PART_RE.findall(ident)))
+    return " ".join(out)
+
 class FileAwareRetriever(BaseRetriever):
     # Pydantic v2 config: allow arbitrary types and no extra errors
     model_config = dict(arbitrary_types_allowed=True)
@@ -56,20 +72,34 @@ class FileAwareRetriever(BaseRetriever):
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun
     ) -> List[Document]:
         base = self.vector_store.similarity_search_with_score(query, k=self.k * 2)
-        tokens = self._identifiers(query)
+        return self._rerank(query, base)
+
+    def batch_get_relevant_documents(self, queries: List[str]) -> List[List[Document]]:
+        batched = self.vector_store.batch_similarity_search_with_score(queries, k=self.k * 2)
+        return [self._rerank(q, base) for q, base in zip(queries, batched)]
+
+    def _rerank(self, query: str, base: List) -> List[Document]:
+        # Scores are Chroma distances (lower is closer): a name match subtracts its boost.
+        # Token-set intersections per doc instead of a substring test per (doc, token) pair
+        tokens = set(self._identifiers(query))
+        boost = float(self.name_match_boost)
         rescored = []
         for doc, score in base:
+            md = doc.metadata or {}
+            name_toks = md.get("_name_tokens")
+            if name_toks is None:
+                name_toks = name_tokens(md.get("name", ""))
+            file_toks = md.get("_file_tokens")
+            if file_toks is None:
+                file_toks = name_tokens(md.get("file_name", ""))
             adj = float(score)
-            name = (doc.metadata or {}).get("name", "").lower()
-            fname = (doc.metadata or {}).get("file_name", "").lower()
-            for t in tokens:
-                if t in name:
-                    adj += float(self.name_match_boost)
-                if t in fname:
-                    adj += float(self.name_match_boost) * 0.5
+            if tokens:
+                adj -= boost * len(tokens.intersection(name_toks.split()))
+                adj -= boost * 0.5 * len(tokens.intersection(file_toks.split()))
             rescored.append((doc, adj))
-        rescored.sort(key=lambda x: x[1], reverse=True)
+        rescored.sort(key=lambda x: x[1])
         return [d for d, _ in rescored[: self.k]]
 
     def _identifiers(self, q: str) -> List[str]:
-        return [t for t in re.findall(r"\\b[a-zA-Z_][a-zA-Z0-9_]*\\b", (q or "").lower()) if len(t) >= 3]
+        # Deduplicated (first-seen order) so a repeated word doesn't boost twice
+        return list(dict.fromkeys(t for t in _IDENT_RE.findall((q or "").lower()) if len(t) >= 3))
@@ -2,6 +2,13 @@ from __future__ import annotations
 from pathlib import Path
 import json
 import networkx as nx
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
 from cqia.analysis.dependency_graph import write_dep_json
 from cqia.reporting.schema import ReportJSON, FindingJSON, DepMetricsJSON, ScanSummaryJSON
 
@@ -15,12 +22,24 @@ def export_json_report(
     by_language: dict[str, int],
     findings: list[FindingJSON],
     dep_metrics: DepMetricsJSON,
+    root: str | None = None,
+    source_mtime_ns: int | None = None,
 ) -> Path:
     out = reports_dir / "report.json"
     payload = ReportJSON(
-        summary=ScanSummaryJSON(files_scanned=files_scanned, by_language=by_language),
+        summary=ScanSummaryJSON(
+            files_scanned=files_scanned,
+            by_language=by_language,
+            root=root,
+            source_mtime_ns=source_mtime_ns,
+        ),
         findings=findings,
         dependencies=dep_metrics,
     )
-    out.write_text(json.dumps(payload.model_dump(), indent=2), encoding="utf-8")
+    data = payload.model_dump()
+    if _HAS_ORJSON:
+        opts = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+        out.write_bytes(orjson.dumps(data, option=opts))
+    else:
+        out.write_text(json.dumps(data, indent=2), encoding="utf-8")
     return out
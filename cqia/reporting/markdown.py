@@ -1,6 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, Dict, List, Any, Mapping
+from typing import Iterable, Dict, List, Any, Mapping, Tuple
+import os
 
 from cqia.ingestion.walker import FileMeta
 from cqia.analysis.severity import ScoredFinding
@@ -65,11 +66,29 @@ def _toc() -> str:
         "- [Dependencies](#dependencies)\n"
     )
 
-def write_basic_report(files: Iterable[FileMeta], out_dir: Path) -> Path:
+FileRow = Tuple[str, str, str, str]
+
+def render_file_rows(files: Iterable[FileMeta]) -> List[FileRow]:
+    """(path, language, lines, bytes) as display strings, rendered once for CLI and report."""
+    return [
+        (
+            os.fspath(getattr(f, "path", "")),
+            getattr(f, "language", "unknown"),
+            str(int(getattr(f, "lines", 0) or 0)),
+            str(int(getattr(f, "bytes", 0) or 0)),
+        )
+        for f in files
+    ]
+
+def write_basic_report(
+    files: Iterable[FileMeta], out_dir: Path, rendered: List[FileRow] | None = None
+) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "report.md"
 
     files_list = list(files)
+    if rendered is None:
+        rendered = render_file_rows(files_list)
     lang_counts: Dict[str, int] = {}
     for f in files_list:
         lang = getattr(f, "language", "unknown")
@@ -87,11 +106,7 @@ def write_basic_report(files: Iterable[FileMeta], out_dir: Path) -> Path:
     lines.append(f"- Files scanned: {total}\n")
     lines.append(f"- Python: {py}  |  JavaScript: {js}  |  TypeScript: {ts}\n")
     lines.append("\n### File listing\n")
-    for f in files_list:
-        path = getattr(f, "path", "")
-        lang = getattr(f, "language", "unknown")
-        ln = int(getattr(f, "lines", 0) or 0)
-        lines.append(f"- {path} ({lang}, {ln} lines)\n")
+    lines.extend(f"- {path} ({lang}, {ln} lines)\n" for path, lang, ln, _ in rendered)
 
     out_path.write_text("".join(lines), encoding="utf-8")
     return out_path
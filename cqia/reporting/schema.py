@@ -32,6 +32,10 @@ class DepMetricsJSON(BaseModel):
 class ScanSummaryJSON(BaseModel):
     files_scanned: int = Field(..., ge=0)
     by_language: Dict[str, int] = Field(..., description="Counts per language")
+    root: Optional[str] = Field(None, description="Resolved path of the analyzed root")
+    source_mtime_ns: Optional[int] = Field(
+        None, description="Newest mtime (ns) of the scanned sources when the scan started"
+    )
 
 class ReportJSON(BaseModel):
     summary: ScanSummaryJSON
@@ -93,6 +93,7 @@ def api_analyze(req: AnalyzeRequest):
         warn_at=rules.get("complexity", {}).get("warn_at", 10),
         dup_k=rules.get("duplication", {}).get("k_shingle", 7),
         dup_threshold=rules.get("duplication", {}).get("similarity_threshold", 0.90),
+        include_raw=True,
     )
 
     append_top_issues(out_path, results.get("findings_scored", []))
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from cqia.analysis.detectors.duplication import _lsh_params, detect_duplication
+from cqia.parsing.python_parser import parse_python
+
+BODY = '''\
+def {name}(items, limit):
+    total = 0
+    seen = set()
+    for item in items:
+        if item in seen or item > limit:
+            continue
+        seen.add(item)
+        total = total + item * 2
+    return total
+'''
+
+OTHER = '''\
+def render(rows):
+    out = []
+    for r in rows:
+        out.append(", ".join(str(c) for c in r))
+    return "\\n".join(out)
+'''
+
+
+def _functions():
+    fns = []
+    fns += parse_python(Path("pkg/a.py"), BODY.format(name="sum_a")).functions
+    fns += parse_python(Path("pkg/b.py"), BODY.format(name="sum_b")).functions
+    fns += parse_python(Path("pkg/c.py"), OTHER).functions
+    return fns
+
+
+def test_lsh_params_cover_threshold():
+    bands, rows = _lsh_params(0.9)
+    assert 1.0 - (1.0 - 0.9 ** rows) ** bands >= 0.99
+
+
+def test_lsh_finds_the_same_pairs_as_exact_sweep():
+    lsh = detect_duplication(_functions(), threshold=0.8, use_lsh=True)
+    exact = detect_duplication(_functions(), threshold=0.8, use_lsh=False)
+    assert [f.files for f in lsh] == [f.files for f in exact] == [("pkg/a.py", "pkg/b.py")]
+
+
+def test_same_file_pairs_are_not_reported():
+    fns = parse_python(Path("pkg/a.py"), BODY.format(name="x") + BODY.format(name="y")).functions
+    assert detect_duplication(fns, threshold=0.8) == []
+
+
+def test_k_by_lang_overrides_shingle_size():
+    # A shingle longer than either function leaves nothing to compare
+    assert detect_duplication(_functions(), threshold=0.8, k_by_lang={"python": 500}) == []
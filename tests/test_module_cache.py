@@ -0,0 +1,106 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cqia.analysis import module_cache
+from cqia.analysis.module_cache import ModuleCache, default_cache_dir, open_module_cache
+from cqia.analysis.runner import run_analysis
+from cqia.parsing.python_parser import parse_python
+
+SRC = "def f(x):\n    return x + 1\n"
+
+_UNPICKLED: list[str] = []
+
+
+def _record():
+    _UNPICKLED.append("planted")
+    return None
+
+
+class _Planted:
+    def __reduce__(self):
+        return (_record, ())
+
+
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path, monkeypatch):
+    # Signing key and default cache dir live under a per-test user cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "user-cache"))
+    monkeypatch.setattr(module_cache, "_SECRET", None)
+    _UNPICKLED.clear()
+    return tmp_path / "user-cache"
+
+
+def _repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "mod.py").write_text(SRC, encoding="utf-8")
+    return root
+
+
+def test_disabled_without_directory():
+    assert open_module_cache(None) is None
+    assert open_module_cache("") is None
+
+
+def test_round_trip(tmp_path):
+    cache = ModuleCache(str(tmp_path / "c"))
+    rel = Path("pkg/mod.py")
+    key = ModuleCache.make_key(rel, "python", SRC)
+    cache.set(key, parse_python(rel, SRC))
+    hit = cache.get(key)
+    assert hit is not None
+    assert [fn.name for fn in hit.functions] == ["f"]
+
+
+def test_key_depends_on_path_text_and_parser(monkeypatch):
+    rel = Path("pkg/mod.py")
+    key = ModuleCache.make_key(rel, "python", SRC)
+    assert key != ModuleCache.make_key(Path("pkg/other.py"), "python", SRC)
+    assert key != ModuleCache.make_key(rel, "python", SRC + "\n")
+    monkeypatch.setattr(module_cache, "_PARSER_STAMP", "changed")
+    assert key != ModuleCache.make_key(rel, "python", SRC)
+
+
+def test_degraded_module_is_not_stored(tmp_path):
+    cache = ModuleCache(str(tmp_path / "c"))
+    rel = Path("pkg/mod.js")
+    mod = parse_python(rel, "")
+    mod.degraded = True
+    key = ModuleCache.make_key(rel, "javascript", "function f() {}")
+    cache.set(key, mod)
+    assert cache.get(key) is None
+
+
+def test_run_analysis_uses_cache_only_when_asked(tmp_path):
+    root = _repo(tmp_path)
+    args = (root, ["**/*.py"], [], None, 2_000_000, 10, 0.6, 0.8)
+    run_analysis(*args)
+    assert not default_cache_dir(root).exists()
+    run_analysis(*args, module_cache=True)
+    assert any(default_cache_dir(root).iterdir())
+    assert not (root / ".cqia_cache").exists()
+
+
+def test_cache_under_the_analyzed_root_is_never_read(tmp_path):
+    root = _repo(tmp_path)
+    planted = root / ".cqia_cache" / "modules"
+    planted.mkdir(parents=True)
+    key = ModuleCache.make_key(Path("pkg/mod.py"), "python", SRC)
+    (planted / f"{key}.pkl").write_bytes(pickle.dumps(_Planted()))
+    res = run_analysis(root, ["**/*.py"], [], None, 2_000_000, 10, 0.6, 0.8, module_cache=True)
+    assert _UNPICKLED == []
+    assert res is not None
+
+
+def test_unsigned_or_foreign_entries_are_rejected(tmp_path):
+    cache = ModuleCache(tmp_path / "c")
+    key = ModuleCache.make_key(Path("pkg/mod.py"), "python", SRC)
+    payload = pickle.dumps(_Planted())
+    (tmp_path / "c" / f"{key}.pkl").write_bytes(payload)
+    assert cache.get(key) is None
+    # Signed for a different key, as if copied over from another entry
+    (tmp_path / "c" / f"{key}.pkl").write_bytes(module_cache._mac("other", payload) + payload)
+    assert cache.get(key) is None
+    assert _UNPICKLED == []
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from cqia.analysis.detectors import performance
+from cqia.analysis.detectors.performance import detect_performance
+from cqia.parsing.python_parser import parse_python
+
+SRC = '''\
+import requests
+
+def fetch_all(urls):
+    out = []
+    for u in urls:
+        out.append(requests.get(u))
+    return out
+
+def join_all(parts):
+    s = ""
+    for p in parts:
+        s = s + p
+    return s
+
+def chained(items):
+    for it in items:
+        make().close()
+'''
+
+
+def _detect(text: str, rel: Path = Path("pkg/mod.py"), parallel: bool = False):
+    mod = parse_python(rel, text)
+    return detect_performance(mod.functions, Path("."), parallel=parallel, texts={rel: text})
+
+
+def test_emits_requests_and_concat_findings():
+    kinds = sorted(f.kind for f in _detect(SRC))
+    assert kinds == ["requests_in_loop", "string_concat_in_loop"]
+
+
+def test_findings_are_attributed_to_their_function_lines():
+    by_kind = {f.kind: f for f in _detect(SRC)}
+    assert by_kind["requests_in_loop"].start_line == 6
+    assert by_kind["string_concat_in_loop"].start_line == 12
+
+
+def test_scan_error_in_one_file_keeps_other_files(monkeypatch):
+    good, bad = Path("pkg/good.py"), Path("pkg/bad.py")
+    real_scan = performance._scan_tree
+
+    def scan(src_path, tree):
+        if src_path == bad:
+            raise RuntimeError("boom")
+        return real_scan(src_path, tree)
+
+    monkeypatch.setattr(performance, "_scan_tree", scan)
+    functions = parse_python(good, SRC).functions + parse_python(bad, SRC).functions
+    found = detect_performance(functions, Path("."), parallel=False, texts={good: SRC, bad: SRC})
+    assert {f.file for f in found} == {"pkg/good.py"}
+    assert len(found) == 2
@@ -0,0 +1,104 @@
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("langchain_huggingface")
+
+from langchain.docstore.document import Document  # noqa: E402
+
+from cqia.ingestion.walker import FileMeta  # noqa: E402
+from cqia.rag.embeddings import vector_store  # noqa: E402
+
+
+class FakeStore:
+    def __init__(self, persist_directory=".cqia_vectordb", embedding_model=""):
+        # Like CodeVectorStore, creates the directory the manifest is written to
+        Path(persist_directory).mkdir(parents=True, exist_ok=True)
+        self.added: list[str] = []
+        self.deleted: list[str] = []
+        self.fail = False
+
+    def add_documents(self, documents, batch_size=100, ids=None):
+        if self.fail:
+            raise RuntimeError("embedding failed")
+        self.added.extend(ids)
+        return ids
+
+    def delete_by_file_path(self, file_path):
+        self.deleted.append(file_path)
+        return 0
+
+
+def _chunk(path, text, language):
+    return [Document(page_content=line, metadata={"file_path": path}) for line in text.splitlines()]
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "CodeVectorStore", FakeStore)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.py").write_text("a = 1\nb = 2\n", encoding="utf-8")
+    (src / "b.py").write_text("c = 3\n", encoding="utf-8")
+    return tmp_path
+
+
+def _metas(root):
+    return [FileMeta(p, p.stat().st_size, 1, "python") for p in sorted((root / "src").iterdir())]
+
+
+def _manager(root):
+    return vector_store.CodeEmbeddingManager(persist_directory=str(root / "db"))
+
+
+def test_unchanged_files_are_skipped_on_the_next_run(repo):
+    first = _manager(repo)
+    res = first.index_repository(_metas(repo), _chunk, max_workers=2)
+    assert res["successful_files"] == 2
+    assert len(first.vector_store.added) == 3
+
+    second = _manager(repo)
+    res = second.index_repository(_metas(repo), _chunk, max_workers=2)
+    assert res["skipped_files"] == 2
+    assert second.vector_store.added == []
+
+
+def test_touched_file_with_same_content_is_not_reembedded(repo):
+    _manager(repo).index_repository(_metas(repo), _chunk)
+    a = repo / "src" / "a.py"
+    st = a.stat()
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    again = _manager(repo)
+    res = again.index_repository(_metas(repo), _chunk)
+    assert res["skipped_files"] == 2
+    assert again.vector_store.added == []
+
+
+def test_changed_file_replaces_only_its_chunks(repo):
+    _manager(repo).index_repository(_metas(repo), _chunk)
+    a = repo / "src" / "a.py"
+    a.write_text("a = 10\n", encoding="utf-8")
+    os.utime(a, ns=(a.stat().st_atime_ns, a.stat().st_mtime_ns + 10**9))
+
+    again = _manager(repo)
+    res = again.index_repository(_metas(repo), _chunk)
+    assert res["successful_files"] == 1
+    assert again.vector_store.deleted == [str(a)]
+    assert again.vector_store.added == [f"{a}::0"]
+
+
+def test_failed_embedding_is_retried_next_run(repo):
+    failing = _manager(repo)
+    failing.vector_store.fail = True
+    res = failing.index_repository(_metas(repo), _chunk)
+    assert res["failed_files"] == 2
+    assert res["successful_files"] == 0
+
+    retry = _manager(repo)
+    res = retry.index_repository(_metas(repo), _chunk)
+    assert res["successful_files"] == 2
+    assert len(retry.vector_store.added) == 3